@@ -1,19 +1,48 @@
 from backend.catalogs.supabase_client import supabase
-from backend.catalogs.helpers import contains_banned_language, image_is_safe
+from backend.catalogs.helpers import contains_banned_language, image_is_safe, batch_image_is_safe
+from cachetools import TTLCache, cached
+from cachetools.keys import hashkey
+from threading import Lock
 from uuid import uuid4
+import asyncio
 
 
+# Short-lived read caches. Catalog pages are read far more often than they
+# change; every write path below clears the affected entries.
+# Single-process only - a multi-instance deploy would move these to Redis.
+_cache_lock = Lock()
+catalog_cache = TTLCache(maxsize=5000, ttl=30)          # catalog_id -> catalog row
+items_cache = TTLCache(maxsize=5000, ttl=30)            # catalog_id -> items
+catalog_with_items_cache = TTLCache(maxsize=5000, ttl=30)
+owner_catalogs_cache = TTLCache(maxsize=5000, ttl=30)   # (owner_id, include_private) -> catalogs
 
-def create_catalog(owner_id: str, title: str, image: str, visibility="public"):
-    # 1️⃣ Check title
+
+def invalidate_catalog_cache(catalog_id: str, owner_id: str | None = None):
+    """Drop cached reads for a catalog (and its owner's listing, if given)."""
+    key = hashkey(catalog_id)
+    with _cache_lock:
+        catalog_cache.pop(key, None)
+        items_cache.pop(key, None)
+        catalog_with_items_cache.pop(key, None)
+        if owner_id:
+            for include_private in (True, False):
+                owner_catalogs_cache.pop(hashkey(owner_id, include_private), None)
+
+
+async def create_catalog(owner_id: str, title: str, image: str, visibility="public"):
+    # 1️⃣ Start the image check, it is a network call
+    image_check = asyncio.create_task(image_is_safe(image))
+
+    # 2️⃣ Check title while moderation is in flight
     if contains_banned_language(title):
+        image_check.cancel()
         raise ValueError("Catalog title contains banned language")
 
-    # 2️⃣ Check image
-    if not image_is_safe(image):
+    # 3️⃣ Check image
+    if not await image_check:
         raise ValueError("Image violates content guidelines")
 
-    # 3️⃣ Insert into Supabase
+    # 4️⃣ Insert into Supabase
     result = supabase.table("catalogs").insert({
         "id": str(uuid4()),
         "owner_id": owner_id,
@@ -22,7 +51,10 @@ def create_catalog(owner_id: str, title: str, image: str, visibility="public"):
         "visibility": visibility,
     }).execute()
 
-    return result.data[0]
+    catalog = result.data[0]
+    invalidate_catalog_cache(catalog["id"], owner_id)
+
+    return catalog
 
 
 def delete_catalog(catalog_id: str):
@@ -31,24 +63,32 @@ def delete_catalog(catalog_id: str):
         .eq("id", catalog_id) \
         .execute()
 
+    owner_id = response.data[0].get("owner_id") if response.data else None
+    invalidate_catalog_cache(catalog_id, owner_id)
+
     return response.data
 
-def add_item_to_catalog(
+async def add_item_to_catalog(
     catalog_id: str,
     name: str,
     seller: str,
     image_url: str | None = None,
     url: str | None = None,
 ):
-    # 1️⃣ Check name
+    # 1️⃣ Start the image check (only if provided)
+    image_check = asyncio.create_task(image_is_safe(image_url)) if image_url else None
+
+    # 2️⃣ Check name while moderation is in flight
     if contains_banned_language(name):
+        if image_check:
+            image_check.cancel()
         raise ValueError("Invalid item name")
 
-    # 2️⃣ Check image (only if provided)
-    if image_url and not image_is_safe(image_url):
+    # 3️⃣ Check image
+    if image_check and not await image_check:
         raise ValueError("Image violates content guidelines")
 
-    # 3️⃣ Insert item
+    # 4️⃣ Insert item
     result = supabase.table("catalog_items").insert({
         "catalog_id": catalog_id,
         "name": name,
@@ -57,9 +97,53 @@ def add_item_to_catalog(
         "url": url,
     }).execute()
 
+    invalidate_catalog_cache(catalog_id)
+
     return result.data[0]
 
 
+async def add_items_to_catalog(catalog_id: str, items: list[dict]):
+    """
+    Add several items to a catalog with a single insert.
+
+    Items whose name or image fails the checks are skipped rather than
+    failing the whole batch.
+
+    Returns:
+        (inserted rows, rejected items)
+    """
+    # names are checked locally, images in one moderation request
+    passed = [not contains_banned_language(item["name"]) for item in items]
+
+    to_moderate = [i for i, item in enumerate(items) if passed[i] and item.get("image_url")]
+    if to_moderate:
+        verdicts = await batch_image_is_safe([items[i]["image_url"] for i in to_moderate])
+        for i, safe in zip(to_moderate, verdicts):
+            passed[i] = safe
+
+    rows = [
+        {
+            "catalog_id": catalog_id,
+            "name": item["name"],
+            "seller": item["seller"],
+            "image_url": item.get("image_url"),
+            "url": item.get("url"),
+        }
+        for item, ok in zip(items, passed)
+        if ok
+    ]
+    rejected = [item for item, ok in zip(items, passed) if not ok]
+
+    if not rows:
+        return [], rejected
+
+    result = supabase.table("catalog_items").insert(rows).execute()
+
+    invalidate_catalog_cache(catalog_id)
+
+    return result.data, rejected
+
+
 def delete_item_from_catalog(item_id: str):
     """
     Delete a single item from a catalog by item ID.
@@ -72,8 +156,26 @@ def delete_item_from_catalog(item_id: str):
         .execute()
     )
 
+    for row in res.data or []:
+        invalidate_catalog_cache(row["catalog_id"])
+
     return res.data
 
+
+@cached(catalog_cache, key=lambda catalog_id: hashkey(catalog_id), lock=_cache_lock)
+def get_catalog(catalog_id: str):
+    """
+    Fetch a single catalog row, or None if it doesn't exist.
+    """
+    res = supabase.table("catalogs") \
+        .select("*") \
+        .eq("id", catalog_id) \
+        .execute()
+
+    return res.data[0] if res.data else None
+
+
+@cached(items_cache, key=lambda catalog_id: hashkey(catalog_id), lock=_cache_lock)
 def get_items_in_catalog(catalog_id: str):
     res = supabase.table("catalog_items") \
         .select("*") \
@@ -83,15 +185,36 @@ def get_items_in_catalog(catalog_id: str):
 
     return res.data
 
+
+@cached(catalog_with_items_cache, key=lambda catalog_id: hashkey(catalog_id), lock=_cache_lock)
+def get_catalog_with_items(catalog_id: str):
+    """
+    Fetch a catalog and all of its items with one RPC call.
+
+    Returns:
+        {"catalog": {...}, "items": [...]} or None if the catalog doesn't exist
+    """
+    res = supabase.rpc("get_catalog_with_items", {"cid": catalog_id}).execute()
+
+    return res.data
+
+
+@cached(
+    owner_catalogs_cache,
+    key=lambda owner_id, include_private=True: hashkey(owner_id, include_private),
+    lock=_cache_lock,
+)
 def display_catalogs(owner_id: str, include_private: bool = True):
 
-    res = (
+    query = (
         supabase.table("catalogs")
         .select("id, title, image_url, visibility, created_at")
         .eq("owner_id", owner_id)
-        .order("created_at", desc=True)
-        .execute()
     )
+    if not include_private:
+        query = query.eq("visibility", "public")
+
+    res = query.order("created_at", desc=True).execute()
 
     return res.data
 
@@ -1,8 +1,26 @@
 from pathlib import Path
-from openai import OpenAI
+from openai import AsyncOpenAI
+from cachetools import TTLCache
+import httpx
 from backend.config import OPENAI_API_KEY
+from backend.catalogs.supabase_client import get_async_supabase_admin
+from PIL import Image
+import asyncio
+import hashlib
+import imagehash
+import io
+import ipaddress
+import mmap
+import os
 import re
+import socket
 import unicodedata
+from urllib.parse import urlparse
+
+try:
+    import ahocorasick
+except ImportError:  # no pyahocorasick wheel for this platform
+    ahocorasick = None
 
 
 ALLOWED_IMAGE_TYPES = {
@@ -15,65 +33,289 @@ LEET_MAP = {
     "0": "o", "1": "i", "3": "e", "4": "a",
     "5": "s", "7": "t", "@": "a", "$": "s",
 }
+_LEET_TABLE = str.maketrans(LEET_MAP)
+
+_NON_ALPHA = re.compile(r"[^a-z\s]")
+_WS = re.compile(r"\s+")
+
+http_client = httpx.AsyncClient(
+    limits=httpx.Limits(max_keepalive_connections=20, keepalive_expiry=30),
+)
+
+client = AsyncOpenAI(api_key=OPENAI_API_KEY, http_client=http_client)
 
-client = OpenAI(api_key=OPENAI_API_KEY)
+# parallel moderation calls per batch_image_is_safe
+MODERATION_CONCURRENCY = 8
 
+# near-duplicates of an image we've already judged reuse its verdict
+PHASH_MAX_DISTANCE = 5
 
-def load_banned_words() -> set[str]:
+# strong references so fire-and-forget hash writes aren't garbage collected
+_background_tasks: set = set()
+
+# limits on user images downloaded and decoded server-side; anything bigger
+# is left for OpenAI to fetch (moderation, categorization) instead
+IMAGE_MAX_BYTES = 10 * 1024 * 1024
+IMAGE_MAX_PIXELS = 40_000_000
+
+
+def load_banned_words() -> frozenset[str]:
     path = Path(__file__).parent / "bannedwords.txt"
 
-    banned = set()
-    with open(path, "r", encoding="utf-8") as f:
-        for line in f:
-            word = line.strip().lower()
-            if word and not word.startswith("#"):
-                banned.add(word)
+    # map the file and split it as bytes, decoding only the words we keep
+    with open(path, "rb") as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return frozenset()
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            lines = mm[:].splitlines()
+
+    return frozenset(
+        word.decode("utf-8").lower()
+        for word in map(bytes.strip, lines)
+        if word and not word.startswith(b"#")
+    )
+
+
+def build_banned_automaton(words: frozenset[str]):
+    automaton = ahocorasick.Automaton()
+    for word in words:
+        automaton.add_word(word, word)
+    automaton.make_automaton()
+
+    return automaton
 
-    return banned
+
+def build_banned_regex(words: frozenset[str]) -> re.Pattern:
+    # one alternation scanned by the C regex engine; longest first so
+    # overlapping words resolve to the longer one
+    if not words:
+        return re.compile(r"(?!)")
+    return re.compile("|".join(map(re.escape, sorted(words, key=len, reverse=True))))
 
 BANNED_WORDS = load_banned_words()
 
+# Aho-Corasick when available, otherwise the compiled regex. An empty list
+# can't be made into an automaton (iter() on it raises), so it takes the
+# regex path, which never matches.
+BANNED_AUTOMATON = build_banned_automaton(BANNED_WORDS) if ahocorasick and BANNED_WORDS else None
+_BANNED_RE = build_banned_regex(BANNED_WORDS) if BANNED_AUTOMATON is None else None
 
 
 def normalize(text: str) -> str:
     text = text.lower()
     text = unicodedata.normalize("NFKD", text)
+    text = text.translate(_LEET_TABLE)
 
-    for k, v in LEET_MAP.items():
-        text = text.replace(k, v)
-
-    text = re.sub(r"[^a-z\s]", " ", text)
-    text = re.sub(r"\s+", " ", text).strip()
+    text = _NON_ALPHA.sub(" ", text)
+    text = _WS.sub(" ", text).strip()
 
     return text
 
-def image_is_safe(image_url: str) -> bool:
+
+# moderation verdicts keyed by sha256 of the image URL, kept for a day
+_moderation_cache = TTLCache(maxsize=10_000, ttl=86400)
+
+
+def check_image_size(img: Image.Image):
+    """raise before decoding an image over IMAGE_MAX_PIXELS (open() only reads the header)"""
+    if img.width * img.height > IMAGE_MAX_PIXELS:
+        raise ValueError(f"image too large to decode ({img.width}x{img.height})")
+
+
+def image_phash(data: bytes) -> int:
+    """64-bit perceptual hash as a signed int, to fit a bigint column"""
+    with Image.open(io.BytesIO(data)) as img:
+        check_image_size(img)
+        value = int(str(imagehash.phash(img)), 16)
+    return value - (1 << 64) if value >= 1 << 63 else value
+
+
+async def is_public_host(hostname: str) -> bool:
+    """True if every address the name resolves to is globally routable"""
+    try:
+        infos = await asyncio.get_running_loop().getaddrinfo(hostname, None)
+    except socket.gaierror:
+        return False
+    return bool(infos) and all(
+        ipaddress.ip_address(info[4][0].split("%")[0]).is_global for info in infos
+    )
+
+
+async def download_image(image_url: str) -> bytes:
     """
-    Returns True if image is safe, False if flagged.
+    Fetch a user-supplied image URL. Only public hosts, no redirects,
+    image/* responses only, at most IMAGE_MAX_BYTES.
     """
-    response = client.moderations.create(
+    parsed = urlparse(image_url)
+    if parsed.scheme not in ("http", "https") or not parsed.hostname:
+        raise ValueError("not an http(s) URL")
+    if not await is_public_host(parsed.hostname):
+        raise ValueError(f"host {parsed.hostname} is not public")
+
+    async with http_client.stream("GET", image_url, timeout=10.0) as response:
+        response.raise_for_status()
+        content_type = response.headers.get("content-type", "")
+        if not content_type.startswith("image/"):
+            raise ValueError(f"not an image ({content_type or 'no content-type'})")
+        if int(response.headers.get("content-length") or 0) > IMAGE_MAX_BYTES:
+            raise ValueError("image too large to download")
+
+        data = bytearray()
+        async for chunk in response.aiter_bytes():
+            data += chunk
+            if len(data) > IMAGE_MAX_BYTES:
+                raise ValueError("image too large to download")
+
+    return bytes(data)
+
+
+async def fetch_phash(image_url: str) -> int | None:
+    try:
+        data = await download_image(image_url)
+        return await asyncio.to_thread(image_phash, data)
+    except Exception as e:
+        print(f"⚠️ Could not hash image {image_url}: {e}")
+        return None
+
+
+async def known_verdict(phash: int) -> bool | None:
+    """verdict of the closest previously judged image within PHASH_MAX_DISTANCE"""
+    sb = await get_async_supabase_admin()
+    if sb is None:
+        return None
+    response = await sb.rpc("match_image_hash", {
+        "p_hash": phash,
+        "p_max_distance": PHASH_MAX_DISTANCE,
+    }).execute()
+    return response.data[0]["safe"] if response.data else None
+
+
+async def remember_verdict(phash: int, safe: bool):
+    sb = await get_async_supabase_admin()
+    if sb is None:
+        return
+    await sb.table("image_hashes").upsert({"phash": phash, "safe": safe}).execute()
+
+
+async def moderate_image_url(image_url: str) -> bool:
+    """One moderation call on the image itself (an image part, not the URL text)"""
+    response = await client.moderations.create(
         model="omni-moderation-latest",
-        input=image_url,
+        input=[{"type": "image_url", "image_url": {"url": image_url}}],
     )
 
-    result = response.results[0]
-
     # flagged == True means unsafe
-    return not result.flagged
+    return not response.results[0].flagged
+
+
+async def hash_verdict(image_url: str, moderation: asyncio.Task) -> tuple[int | None, bool | None]:
+    """
+    (phash, verdict of a near-duplicate) for the image; either may be None.
+    The lookup is skipped once moderation has already answered.
+    """
+    phash = await fetch_phash(image_url)
+    if phash is None or moderation.done():
+        return phash, None
+    try:
+        return phash, await known_verdict(phash)
+    except Exception as e:
+        print(f"⚠️ Image hash lookup failed: {e}")
+        return phash, None
+
+
+async def image_is_safe(image_url: str) -> bool:
+    """
+    Returns True if image is safe, False if flagged.
+    Repeat checks of the same URL are served from cache, and images that
+    look like one already judged (pHash) reuse its verdict.
+    """
+    key = hashlib.sha256(image_url.encode()).hexdigest()
+    cached = _moderation_cache.get(key)
+    if cached is not None:
+        return cached
+
+    # hash lookup and moderation run side by side; a near-duplicate's
+    # verdict wins if it comes back first
+    moderation = asyncio.create_task(moderate_image_url(image_url))
+    lookup = asyncio.create_task(hash_verdict(image_url, moderation))
+    try:
+        await asyncio.wait({lookup, moderation}, return_when=asyncio.FIRST_COMPLETED)
+        if lookup.done():
+            _, known = lookup.result()
+            if known is not None:
+                moderation.cancel()
+                _moderation_cache[key] = known
+                return known
+
+        safe = await moderation
+    except BaseException:
+        lookup.cancel()
+        moderation.cancel()
+        raise
+
+    _moderation_cache[key] = safe
+
+    # the caller has its answer; hashing finishes in the background
+    task = asyncio.create_task(remember_when_hashed(lookup, safe))
+    _background_tasks.add(task)
+    task.add_done_callback(_background_tasks.discard)
+
+    return safe
+
+
+async def remember_when_hashed(lookup: asyncio.Task, safe: bool):
+    """store a moderation verdict under the image's hash once it's computed"""
+    # only verdicts from moderating the image itself are shared by hash
+    phash, _ = await lookup
+    if phash is None:
+        return
+    try:
+        await remember_verdict(phash, safe)
+    except Exception as e:
+        print(f"⚠️ Could not store image hash: {e}")
+
+
+async def batch_image_is_safe(image_urls: list[str]) -> list[bool]:
+    """
+    Same as image_is_safe for many URLs at once, in input order.
+    Cached URLs are answered locally. A multimodal input gets one combined
+    result, so the rest go out as one request per image, MODERATION_CONCURRENCY
+    at a time.
+    """
+    keys = [hashlib.sha256(url.encode()).hexdigest() for url in image_urls]
+
+    verdicts = {}
+    unseen = {}
+    for url, key in zip(image_urls, keys):
+        cached = _moderation_cache.get(key)
+        if cached is None:
+            unseen[key] = url
+        else:
+            verdicts[key] = cached
+
+    if unseen:
+        semaphore = asyncio.Semaphore(MODERATION_CONCURRENCY)
+
+        async def moderate(url: str) -> bool:
+            async with semaphore:
+                return await moderate_image_url(url)
+
+        results = await asyncio.gather(*(moderate(url) for url in unseen.values()))
+        for key, safe in zip(unseen, results):
+            verdicts[key] = _moderation_cache[key] = safe
+
+    return [verdicts[key] for key in keys]
+
 
 def contains_banned_language(text: str) -> bool:
     normalized = normalize(text)
 
-    tokens = normalized.split(" ")
-
-    # exact token match
-    for token in tokens:
-        if token in BANNED_WORDS:
-            return True
+    if BANNED_AUTOMATON is None:
+        return _BANNED_RE.search(normalized) is not None
 
-    # substring match (important for compound words)
-    for banned in BANNED_WORDS:
-        if banned in normalized:
-            return True
+    # single pass over the text; every token match is also a substring match,
+    # so this covers compound words as well
+    for _ in BANNED_AUTOMATON.iter(normalized):
+        return True
 
     return False
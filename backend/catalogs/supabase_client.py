@@ -1,8 +1,71 @@
 import os
-from supabase import create_client, Client
-from backend.config import NEXT_PUBLIC_SUPABASE_URL, NEXT_PUBLIC_SUPABASE_ANON_KEY
+import asyncio
+import httpx
+from supabase import create_client, Client, ClientOptions, acreate_client, AsyncClient, AsyncClientOptions
+from typing import Optional
+from backend.config import NEXT_PUBLIC_SUPABASE_URL, NEXT_PUBLIC_SUPABASE_ANON_KEY, SUPABASE_SERVICE_ROLE_KEY
 
 SUPABASE_URL= NEXT_PUBLIC_SUPABASE_URL
 SUPABASE_KEY=NEXT_PUBLIC_SUPABASE_ANON_KEY
 
-supabase: Client = create_client(SUPABASE_URL, SUPABASE_KEY)
+
+def pooled_http_client() -> httpx.Client:
+    """
+    Keep-alive HTTP/2 pool so queries reuse connections instead of paying a
+    TLS handshake per call. Each Supabase client gets its own, since the
+    client stores its auth headers on it.
+    """
+    return httpx.Client(
+        transport=httpx.HTTPTransport(
+            http2=True,
+            retries=2,
+            limits=httpx.Limits(max_keepalive_connections=20, max_connections=50, keepalive_expiry=30),
+        ),
+    )
+
+
+def pooled_async_http_client() -> httpx.AsyncClient:
+    """Async counterpart of pooled_http_client"""
+    return httpx.AsyncClient(
+        transport=httpx.AsyncHTTPTransport(
+            http2=True,
+            retries=2,
+            limits=httpx.Limits(max_keepalive_connections=50, max_connections=100, keepalive_expiry=30),
+        ),
+    )
+
+
+supabase: Client = create_client(
+    SUPABASE_URL,
+    SUPABASE_KEY,
+    options=ClientOptions(httpx_client=pooled_http_client()),
+)
+
+# Service-role client shared by the routers that bypass RLS (feed, items).
+# None when the service key isn't configured.
+supabase_admin: Optional[Client] = None
+if SUPABASE_URL and SUPABASE_SERVICE_ROLE_KEY:
+    supabase_admin = create_client(
+        SUPABASE_URL,
+        SUPABASE_SERVICE_ROLE_KEY,
+        options=ClientOptions(httpx_client=pooled_http_client()),
+    )
+
+# Async service-role client for routers that await Supabase directly (items).
+# Creating one is a coroutine, so it's built on first use.
+_async_supabase_admin: Optional[AsyncClient] = None
+_async_supabase_admin_lock = asyncio.Lock()
+
+
+async def get_async_supabase_admin() -> Optional[AsyncClient]:
+    """Shared async service-role client, or None when the service key isn't configured"""
+    global _async_supabase_admin
+    if _async_supabase_admin is None and SUPABASE_URL and SUPABASE_SERVICE_ROLE_KEY:
+        async with _async_supabase_admin_lock:
+            if _async_supabase_admin is None:
+                _async_supabase_admin = await acreate_client(
+                    SUPABASE_URL,
+                    SUPABASE_SERVICE_ROLE_KEY,
+                    options=AsyncClientOptions(httpx_client=pooled_async_http_client()),
+                )
+    return _async_supabase_admin
@@ -11,4 +11,7 @@ SUPABASE_SERVICE_ROLE_KEY = os.getenv("SUPABASE_SERVICE_ROLE_KEY")
 SERPAPI_KEY = os.getenv("SERPAPI_KEY")
 
 OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
-FIRECRAWL_API_KEY = os.getenv("FIRECRAWL_API_KEY")
\ No newline at end of file
+FIRECRAWL_API_KEY = os.getenv("FIRECRAWL_API_KEY")
+
+# Set to 1 to log prompt/cached token counts of categorization calls
+LOG_TOKEN_USAGE = os.getenv("LOG_TOKEN_USAGE") == "1"
@@ -1,6 +1,9 @@
 import asyncio
+import httpx
 import requests
+from urllib.parse import urlparse
 from playwright.async_api import async_playwright
+from selectolax.parser import HTMLParser
 from backend.config import SERPAPI_KEY
 
 
@@ -43,68 +46,176 @@ def serpapi_shopping_search(query: str, limit: int):
     return cleaned
 
 
-async def get_first_seller_href(product_link: str):
-    async with async_playwright() as p:
-        browser = await p.chromium.launch(
-            headless=True,
-            args=["--disable-blink-features=AutomationControlled"]
-        )
-        page = await browser.new_page()
+MAX_PARALLEL_PAGES = 4
+
+SELLER_SELECTORS = [
+    '[jsname="wN9W3"]',
+    'a[href*="/shopping/product"]',
+    'a[href^="http"]'
+]
+
+# Everything but the generic http link, which also matches header/nav links
+SPECIFIC_SELLER_SELECTORS = SELLER_SELECTORS[:2]
+
+# Attached by Google's JS, so when it is in the raw HTML it's the real one
+SELLER_LINK_SELECTOR = SELLER_SELECTORS[0]
+
+BROWSER_HEADERS = {
+    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 "
+                  "(KHTML, like Gecko) Chrome/124.0 Safari/537.36",
+    "Accept-Language": "en-US,en;q=0.9",
+}
+
+
+async def fetch_seller_href_fast(product_link: str, client: httpx.AsyncClient | None = None):
+    """Try to read the seller href from the static HTML, without a browser.
+
+    Only the seller link itself, or another specific match that points off
+    Google, counts. Returns None when the page can't be fetched or nothing
+    qualifies, so the caller can fall back to Playwright.
+    """
+    if client is None:
+        async with httpx.AsyncClient(http2=True, timeout=10, follow_redirects=True,
+                                     headers=BROWSER_HEADERS) as client:
+            return await fetch_seller_href_fast(product_link, client)
+
+    try:
+        response = await client.get(product_link)
+        response.raise_for_status()
+    except (httpx.HTTPError, httpx.InvalidURL):
+        return None
+
+    tree = HTMLParser(response.text)
+    for selector in SPECIFIC_SELLER_SELECTORS:
+        for node in tree.css(selector):
+            href = node.attributes.get("href")
+            if href and (selector == SELLER_LINK_SELECTOR or is_external_href(href)):
+                return href
+
+    return None
+
+
+def is_external_href(href: str) -> bool:
+    """Absolute http(s) link to somewhere other than Google"""
+    parsed = urlparse(href)
+    host = (parsed.hostname or "").lower()
+    return (
+        parsed.scheme in ("http", "https")
+        and bool(host)
+        and not (host == "google.com" or host.startswith("google.") or ".google." in host)
+    )
+
+
+async def launch_browser(p):
+    return await p.chromium.launch(
+        headless=True,
+        args=["--disable-blink-features=AutomationControlled"]
+    )
+
+
+async def get_first_seller_href(product_link: str, browser=None):
+    """Open product_link in a fresh context and return the first seller href.
+
+    Pass a running browser to reuse it; otherwise one is launched just for
+    this call.
+    """
+    if browser is None:
+        async with async_playwright() as p:
+            browser = await launch_browser(p)
+            try:
+                return await get_first_seller_href(product_link, browser)
+            finally:
+                await browser.close()
+
+    context = await browser.new_context()
+    try:
+        page = await context.new_page()
 
         await page.goto(product_link, wait_until="networkidle")
 
         # Force lazy-loaded sections
         await page.evaluate("window.scrollTo(0, document.body.scrollHeight)")
-        await asyncio.sleep(1)
-
-        selectors = [
-            '[jsname="wN9W3"]',
-            'a[href*="/shopping/product"]',
-            'a[href^="http"]'
-        ]
 
+        # Nav links exist from the start, so give the JS-rendered seller
+        # selectors a chance to attach before falling back to the generic
+        # one, then pick by priority rather than document order
         seller_href = None
+        try:
+            try:
+                await page.wait_for_selector(", ".join(SPECIFIC_SELLER_SELECTORS), timeout=5000)
+            except Exception:
+                pass
+            for selector in SELLER_SELECTORS:
+                for el in await page.query_selector_all(selector):
+                    seller_href = await el.get_attribute("href")
+                    if seller_href:
+                        break
+                if seller_href:
+                    break
+        except Exception:
+            pass
+    finally:
+        await context.close()
+
+    if not seller_href:
+        raise RuntimeError("Failed to extract seller href")
+
+    return seller_href
 
-        for _ in range(5):  # retry loop
-            for selector in selectors:
-                try:
-                    locator = page.locator(selector)
-                    if await locator.count() > 0:
-                        seller_href = await locator.first.get_attribute("href")
-                        if seller_href:
-                            break
-                except:
-                    pass
 
-            if seller_href:
-                break
+async def get_real_seller_urls_for_items(items):
+    """Given a list of SerpAPI items, get real seller URLs.
+
+    Every link is first tried with a plain HTTP fetch. Only the ones that
+    don't expose the seller link statically go through Playwright, sharing
+    one browser and loading up to MAX_PARALLEL_PAGES pages at once.
+    Items whose seller link can't be found are dropped instead of failing
+    the whole batch.
+    """
+    items = [item for item in items if item.get("product_link")]
+
+    async with httpx.AsyncClient(http2=True, timeout=10, follow_redirects=True,
+                                 headers=BROWSER_HEADERS) as client:
+        hrefs = await asyncio.gather(
+            *(fetch_seller_href_fast(item["product_link"], client) for item in items),
+            return_exceptions=True
+        )
 
-            await asyncio.sleep(1)
+    # A failed fast fetch is just a miss; the browser gets another go at it
+    hrefs = [None if isinstance(href, Exception) else href for href in hrefs]
+    misses = [i for i, href in enumerate(hrefs) if not href]
+    if misses:
+        semaphore = asyncio.Semaphore(MAX_PARALLEL_PAGES)
 
-        await browser.close()
+        async with async_playwright() as p:
+            browser = await launch_browser(p)
 
-        if not seller_href:
-            raise RuntimeError("Failed to extract seller href")
+            async def extract(i):
+                async with semaphore:
+                    hrefs[i] = await get_first_seller_href(items[i]["product_link"], browser)
 
-        return seller_href
+            try:
+                outcomes = await asyncio.gather(
+                    *(extract(i) for i in misses), return_exceptions=True
+                )
+            finally:
+                await browser.close()
 
+        for i, outcome in zip(misses, outcomes):
+            if isinstance(outcome, Exception):
+                print(f"⚠️ No seller link for {items[i]['product_link']}: {outcome}")
 
-async def get_real_seller_urls_for_items(items):
-    """Given a list of SerpAPI items, get real seller URLs using Playwright."""
-    results = []
-    for item in items:
-        if not item.get("product_link"):
-            continue
-
-        real_url = await get_first_seller_href(item["product_link"])
-        results.append({
+    return [
+        {
             "name": item["name"],
             "seller": item["seller"],
             "price": item["price"],
             "image": item["image"],
             "real_url": real_url
-        })
-    return results
+        }
+        for item, real_url in zip(items, hrefs)
+        if real_url
+    ]
 
 
 def scrape_items(query: str, limit: int):
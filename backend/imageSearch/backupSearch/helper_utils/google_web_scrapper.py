@@ -1,26 +1,30 @@
 import requests
 import re
+from functools import lru_cache
 from urllib.parse import urlparse
 from backend.config import FIRECRAWL_API_KEY
 
 API_KEY = FIRECRAWL_API_KEY
 
+_TITLE_RE = re.compile(r"[|\-–]+")
+
 
 def clean_title(title: str) -> str:
     if not title:
         return ""
-    return re.split(r"[|\-–]+", title)[0].strip()
+    return _TITLE_RE.split(title, maxsplit=1)[0].strip()
+
+
+@lru_cache(maxsize=1024)
+def seller_from_netloc(netloc: str) -> str:
+    return netloc.lower().removeprefix("www.").split(".", 1)[0]
 
 
 def extract_seller(url: str) -> str:
     if not url:
         return ""
 
-    netloc = urlparse(url).netloc.lower()
-    if netloc.startswith("www."):
-        netloc = netloc[4:]
-
-    return netloc.split(".")[0]
+    return seller_from_netloc(urlparse(url).netloc)
 
 
 def scrape(query: str, max_items: int = 6):
@@ -46,7 +50,8 @@ def scrape(query: str, max_items: int = 6):
     image_results = response.json().get("data", {}).get("images", [])
 
     final_items = []
-    seen_urls = set()
+    # (host, path) so the same page with different tracking params collapses
+    seen_pages = set()
 
     for item in image_results:
         if len(final_items) >= max_items:
@@ -54,7 +59,6 @@ def scrape(query: str, max_items: int = 6):
 
         item_url = item.get("url")
         img = item.get("imageUrl")
-        title = clean_title(item.get("title"))
 
         if not item_url or not img:
             continue
@@ -64,16 +68,17 @@ def scrape(query: str, max_items: int = 6):
         if not parsed.scheme.startswith("http"):
             continue
 
-        if item_url in seen_urls:
+        page_key = (parsed.netloc.lower(), parsed.path)
+        if page_key in seen_pages:
             continue
 
         final_items.append({
-            "name": title,
+            "name": clean_title(item.get("title")),
             "item_url": item_url,
             "image_url": img,
-            "seller": extract_seller(item_url)
+            "seller": seller_from_netloc(parsed.netloc)
         })
 
-        seen_urls.add(item_url)
+        seen_pages.add(page_key)
 
     return final_items
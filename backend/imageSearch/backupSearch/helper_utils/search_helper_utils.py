@@ -1,39 +1,94 @@
 from openai import OpenAI
+from cachetools import TTLCache, cached
+from threading import Lock
+import httpx
 from backend.config import OPENAI_API_KEY, SUPABASE_SERVICE_ROLE_KEY, NEXT_PUBLIC_SUPABASE_URL
 
+# Keep-alive pool shared by the OpenAI and Supabase clients below
+http_client = httpx.Client(
+    limits=httpx.Limits(max_keepalive_connections=20, keepalive_expiry=30),
+)
 
-client = OpenAI(api_key=OPENAI_API_KEY)
+client = OpenAI(api_key=OPENAI_API_KEY, http_client=http_client)
 
-import uuid
+import io
+import hashlib
 import mimetypes
-from supabase import create_client
+import filetype
+from typing import BinaryIO
+from supabase import create_client, ClientOptions
 
 
 BUCKET = "image-search"
 SUPABASE_URL = NEXT_PUBLIC_SUPABASE_URL
 SUPABASE_KEY = SUPABASE_SERVICE_ROLE_KEY
 
-supabase = create_client(SUPABASE_URL, SUPABASE_KEY)
+supabase = create_client(
+    SUPABASE_URL,
+    SUPABASE_KEY,
+    options=ClientOptions(httpx_client=http_client),
+)
 
 
-def upload_image_bytes_and_get_url(
-    image_bytes: bytes,
-    filename: str = "image.jpg",
-) -> str:
-    assert image_bytes, "Empty image bytes"
+UPLOAD_CHUNK_SIZE = 64 * 1024
 
-    ext = filename.split(".")[-1] if "." in filename else "jpg"
-    object_name = f"{uuid.uuid4()}.{ext}"
 
-    content_type, _ = mimetypes.guess_type(filename)
-    content_type = content_type or "image/jpeg"
+def _iter_chunks(stream: BinaryIO):
+    while chunk := stream.read(UPLOAD_CHUNK_SIZE):
+        yield chunk
 
-    # 🚨 upload() throws on failure — no error object
-    supabase.storage.from_(BUCKET).upload(
-        object_name,
-        image_bytes,
-        {"content-type": content_type},
+
+def upload_image_stream_and_get_url(
+    stream: BinaryIO,
+    filename: str = "image.jpg",
+    content_length: int | None = None,
+) -> str:
+    """
+    Upload a seekable file-like image to the bucket in chunks, without
+    reading it into memory first. Returns the public URL.
+    Objects are named by the sha256 of their bytes, so the same image always
+    gets the same URL.
+    """
+    if content_length is None:
+        stream.seek(0, io.SEEK_END)
+        content_length = stream.tell()
+    stream.seek(0)
+
+    assert content_length, "Empty image stream"
+
+    # Sniff the type from the magic bytes, fall back to the filename
+    kind = filetype.guess(stream.read(261))
+    stream.seek(0)
+
+    if kind:
+        ext, content_type = kind.extension, kind.mime
+    else:
+        ext = filename.split(".")[-1] if "." in filename else "jpg"
+        content_type, _ = mimetypes.guess_type(filename)
+        content_type = content_type or "image/jpeg"
+
+    digest = hashlib.sha256()
+    for chunk in _iter_chunks(stream):
+        digest.update(chunk)
+    stream.seek(0)
+
+    object_name = f"{digest.hexdigest()}.{ext}"
+
+    # storage3's upload() only takes bytes or real files, so stream the body
+    # to the Storage REST endpoint directly
+    response = http_client.post(
+        f"{SUPABASE_URL}/storage/v1/object/{BUCKET}/{object_name}",
+        content=_iter_chunks(stream),
+        headers={
+            "Authorization": f"Bearer {SUPABASE_KEY}",
+            "apikey": SUPABASE_KEY,
+            "content-type": content_type,
+            "content-length": str(content_length),
+            # a repeat upload of the same image overwrites it instead of failing
+            "x-upsert": "true",
+        },
     )
+    response.raise_for_status()
 
     # If we reached here, upload succeeded
     public_url = supabase.storage.from_(BUCKET).get_public_url(object_name)
@@ -43,6 +98,29 @@ def upload_image_bytes_and_get_url(
     return public_url
 
 
+def upload_image_bytes_and_get_url(
+    image_bytes: bytes,
+    filename: str = "image.jpg",
+) -> str:
+    assert image_bytes, "Empty image bytes"
+
+    return upload_image_stream_and_get_url(
+        io.BytesIO(image_bytes),
+        filename,
+        content_length=len(image_bytes),
+    )
+
+
+# search queries keyed by sha256 of the image URL, kept for a day. Uploads
+# are content-addressed, so a repeat upload of the same image hits too.
+_query_cache = TTLCache(maxsize=10_000, ttl=86400)
+
+
+@cached(
+    _query_cache,
+    key=lambda image_url: hashlib.sha256(image_url.encode()).hexdigest(),
+    lock=Lock(),
+)
 def image_to_search_query(image_url: str) -> str | None:
     prompt = """
 You are a fashion-only product recognition expert.
@@ -1,14 +1,29 @@
 from fastapi import APIRouter, HTTPException
 from pydantic import BaseModel
-from openai import OpenAI
+from openai import AsyncOpenAI
+import openai
+from cachetools import TTLCache
 import httpx
 import re
 import base64
+import hashlib
 from backend.config import OPENAI_API_KEY
 router = APIRouter()
 
-client = OpenAI(
-    api_key=OPENAI_API_KEY)
+# One pooled client for image downloads and moderation calls, so repeat
+# requests reuse open connections
+http_client = httpx.AsyncClient(
+    follow_redirects=True,
+    timeout=15.0,
+    limits=httpx.Limits(max_keepalive_connections=20, keepalive_expiry=30),
+)
+
+client = AsyncOpenAI(
+    api_key=OPENAI_API_KEY,
+    http_client=http_client)
+
+# Verdicts for already-moderated http(s) URLs, keyed by sha256 of the URL
+moderated_urls = TTLCache(maxsize=10_000, ttl=86400)
 
 
 class ImageCheckRequest(BaseModel):
@@ -30,6 +45,73 @@ def is_valid_http_url(url: str) -> bool:
     return url.startswith('http://') or url.startswith('https://')
 
 
+def verdict_response(safe: bool) -> ImageCheckResponse:
+    """Build the response for a moderation verdict"""
+    if not safe:
+        return ImageCheckResponse(
+            safe=False,
+            error="Image contains inappropriate content"
+        )
+    return ImageCheckResponse(safe=True)
+
+
+async def moderate_image(image: str):
+    """Run OpenAI moderation on an image URL or data URI"""
+    moderation_response = await client.moderations.create(
+        model="omni-moderation-latest",
+        input=[
+            {
+                "type": "image_url",
+                "image_url": {
+                    "url": image
+                }
+            }
+        ]
+    )
+
+    return moderation_response.results[0]
+
+
+async def download_as_data_uri(image_url: str) -> str | None:
+    """
+    Download an image and return it as a base64 data URI.
+    Returns None if the URL doesn't serve an image.
+    """
+    async with http_client.stream(
+        "GET",
+        image_url,
+        headers={
+            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
+        }
+    ) as response:
+        print(f"📊 Response status: {response.status_code}")
+        response.raise_for_status()
+
+        # Verify it's actually an image before pulling the body
+        content_type = response.headers.get('content-type', '')
+        if not content_type.startswith('image/'):
+            print(f"❌ Not an image! Content-Type: {content_type}")
+            return None
+
+        # Encode to base64 as chunks arrive; only whole 3-byte
+        # groups are encoded so the pieces concatenate cleanly
+        encoded = []
+        pending = b""
+        total_bytes = 0
+        async for chunk in response.aiter_bytes():
+            total_bytes += len(chunk)
+            pending += chunk
+            cut = len(pending) - len(pending) % 3
+            encoded.append(base64.b64encode(pending[:cut]))
+            pending = pending[cut:]
+        encoded.append(base64.b64encode(pending))
+
+        print(f"✓ Image downloaded successfully ({total_bytes} bytes)")
+
+    base64_image = b"".join(encoded).decode('utf-8')
+    return f"data:{content_type};base64,{base64_image}"
+
+
 @router.post("/check-image", response_model=ImageCheckResponse)
 async def check_image(request: ImageCheckRequest):
     """
@@ -46,38 +128,31 @@ async def check_image(request: ImageCheckRequest):
         # If it's already a data URI, use it directly
         if is_data_uri(image_url):
             print(f"📊 Using provided data URI")
-            data_uri = image_url
+            result = await moderate_image(image_url)
 
-        # If it's a valid HTTP URL, download it
+        # If it's a valid HTTP URL, let OpenAI fetch it
         elif is_valid_http_url(image_url):
-            print(f"📥 Downloading from URL: {image_url[:100]}...")
-
-            async with httpx.AsyncClient(follow_redirects=True, timeout=15.0) as http_client:
-                response = await http_client.get(
-                    image_url,
-                    headers={
-                        'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
-                    }
-                )
-
-                print(f"📊 Response status: {response.status_code}")
-                response.raise_for_status()
-
-                # Verify it's actually an image
-                content_type = response.headers.get('content-type', '')
-                if not content_type.startswith('image/'):
-                    print(f"❌ Not an image! Content-Type: {content_type}")
+            url_key = hashlib.sha256(image_url.encode()).hexdigest()
+            if url_key in moderated_urls:
+                print(f"♻️ Using cached verdict")
+                return verdict_response(moderated_urls[url_key])
+
+            try:
+                print(f"🤖 Sending URL to OpenAI moderation...")
+                result = await moderate_image(image_url)
+            except openai.BadRequestError as e:
+                # OpenAI couldn't fetch it (private CDN, hotlink protection...)
+                print(f"⚠️ OpenAI couldn't use the URL ({e}), downloading instead")
+                print(f"📥 Downloading from URL: {image_url[:100]}...")
+
+                data_uri = await download_as_data_uri(image_url)
+                if data_uri is None:
                     return ImageCheckResponse(
                         safe=False,
                         error="URL does not point to an image"
                     )
 
-                # Get image bytes and convert to base64
-                image_bytes = response.content
-                base64_image = base64.b64encode(image_bytes).decode('utf-8')
-                data_uri = f"data:{content_type};base64,{base64_image}"
-
-                print(f"✓ Image downloaded successfully ({len(image_bytes)} bytes)")
+                result = await moderate_image(data_uri)
         else:
             print(f"❌ Invalid URL format")
             return ImageCheckResponse(
@@ -85,23 +160,11 @@ async def check_image(request: ImageCheckRequest):
                 error="Please provide a valid image URL (http:// or https://)"
             )
 
-        # Send to OpenAI moderation
-        print(f"🤖 Sending to OpenAI moderation...")
-        moderation_response = client.moderations.create(
-            model="omni-moderation-latest",
-            input=[
-                {
-                    "type": "image_url",
-                    "image_url": {
-                        "url": data_uri
-                    }
-                }
-            ]
-        )
-
-        result = moderation_response.results[0]
         print(f"📊 Moderation result - flagged: {result.flagged}")
 
+        if is_valid_http_url(image_url):
+            moderated_urls[url_key] = not result.flagged
+
         if result.flagged:
             flagged_categories = [cat for cat, flagged in result.categories.__dict__.items() if flagged]
             print(f"🚫 Blocked image - categories: {flagged_categories}")
@@ -2,15 +2,15 @@ from fastapi import APIRouter, Form
 from fastapi.responses import JSONResponse
 from typing import Optional, List
 from pydantic import BaseModel
-import sys
-from pathlib import Path
-
-# Go up TWO levels to reach Sourced folder
-sys.path.insert(0, str(Path(__file__).parent.parent.parent))
 
+from backend.catalogs.supabase_client import supabase
 from backend.catalogs.base_functions import (
+    get_catalog,
     get_items_in_catalog,
-    add_item_to_catalog
+    get_catalog_with_items,
+    add_item_to_catalog,
+    add_items_to_catalog,
+    invalidate_catalog_cache
 )
 
 router = APIRouter()
@@ -25,21 +25,23 @@ class CatalogItem(BaseModel):
     url: Optional[str]
 
 
+class NewCatalogItem(BaseModel):
+    name: str
+    seller: str
+    image_url: Optional[str] = None
+    url: Optional[str] = None
+
+
 @router.get("/{catalog_id}")
 def get_catalog_detail(catalog_id: str):
     """Get details of a specific catalog"""
     try:
-        from backend.catalogs.supabase_client import supabase
-
-        result = supabase.table("catalogs") \
-            .select("*") \
-            .eq("id", catalog_id) \
-            .execute()
+        catalog = get_catalog(catalog_id)
 
-        if not result.data or len(result.data) == 0:
+        if not catalog:
             return JSONResponse(status_code=404, content={"error": "Catalog not found"})
 
-        return result.data[0]
+        return catalog
     except Exception as e:
         import traceback
         traceback.print_exc()
@@ -58,6 +60,22 @@ def get_catalog_items_endpoint(catalog_id: str):
         return JSONResponse(status_code=500, content={"error": str(e)})
 
 
+@router.get("/{catalog_id}/with-items")
+def get_catalog_with_items_endpoint(catalog_id: str):
+    """Get a catalog and its items in a single request"""
+    try:
+        data = get_catalog_with_items(catalog_id)
+
+        if not data:
+            return JSONResponse(status_code=404, content={"error": "Catalog not found"})
+
+        return data
+    except Exception as e:
+        import traceback
+        traceback.print_exc()
+        return JSONResponse(status_code=500, content={"error": str(e)})
+
+
 @router.post("/{catalog_id}/items")
 async def add_item_endpoint(
         catalog_id: str,
@@ -68,7 +86,7 @@ async def add_item_endpoint(
 ):
     """Add an item to a catalog"""
     try:
-        item = add_item_to_catalog(
+        item = await add_item_to_catalog(
             catalog_id=catalog_id,
             name=name,
             seller=seller,  # Pass seller
@@ -86,17 +104,33 @@ async def add_item_endpoint(
         return JSONResponse(status_code=500, content={"error": str(e)})
 
 
+@router.post("/{catalog_id}/items/bulk")
+async def add_items_bulk_endpoint(catalog_id: str, items: List[NewCatalogItem]):
+    """Add several items to a catalog in one insert"""
+    try:
+        inserted, rejected = await add_items_to_catalog(
+            catalog_id=catalog_id,
+            items=[item.dict() for item in items]
+        )
+        return {"success": True, "items": inserted, "rejected": rejected}
+    except Exception as e:
+        import traceback
+        traceback.print_exc()
+        return JSONResponse(status_code=500, content={"error": str(e)})
+
+
 @router.delete("/items/{item_id}")
 def delete_item_endpoint(item_id: str):
     """Delete a single item from catalog"""
     try:
-        from backend.catalogs.supabase_client import supabase
-
         res = supabase.table("catalog_items") \
             .delete() \
             .eq("id", item_id) \
             .execute()
 
+        for row in res.data or []:
+            invalidate_catalog_cache(row["catalog_id"])
+
         return {"success": True, "data": res.data}
     except Exception as e:
         import traceback
@@ -108,13 +142,14 @@ def delete_item_endpoint(item_id: str):
 async def delete_multiple_items_endpoint(item_ids: List[str]):
     """Delete multiple items at once"""
     try:
-        from backend.catalogs.supabase_client import supabase
-
         res = supabase.table("catalog_items") \
             .delete() \
             .in_("id", item_ids) \
             .execute()
 
+        for catalog_id in {row["catalog_id"] for row in res.data or []}:
+            invalidate_catalog_cache(catalog_id)
+
         return {"success": True, "deleted_count": len(item_ids), "data": res.data}
     except Exception as e:
         import traceback
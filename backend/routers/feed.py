@@ -1,8 +1,11 @@
 from fastapi import APIRouter, HTTPException, Header
 from pydantic import BaseModel
 from typing import List, Optional, Dict, Any
-from supabase import create_client, Client
+from supabase import Client
+from cachetools import TTLCache
+import asyncio
 import random
+import weakref
 from datetime import datetime, timedelta
 import sys
 from pathlib import Path
@@ -10,7 +13,7 @@ from pathlib import Path
 # Go up TWO levels to reach Sourced folder
 sys.path.insert(0, str(Path(__file__).parent.parent.parent))
 
-from backend.config import NEXT_PUBLIC_SUPABASE_URL, SUPABASE_SERVICE_ROLE_KEY
+from backend.catalogs.supabase_client import supabase_admin
 
 router = APIRouter()
 
@@ -22,17 +25,22 @@ async def test_feed():
     return {"status": "Feed router is working!", "timestamp": datetime.utcnow().isoformat()}
 
 
-# Initialize Supabase client
-SUPABASE_URL = NEXT_PUBLIC_SUPABASE_URL
-SUPABASE_KEY = SUPABASE_SERVICE_ROLE_KEY
-
-supabase: Optional[Client] = None
-if SUPABASE_URL and SUPABASE_KEY:
-    supabase = create_client(SUPABASE_URL, SUPABASE_KEY)
-else:
+# Shared service-role Supabase client (pooled connections)
+supabase: Optional[Client] = supabase_admin
+if supabase is None:
     print("⚠️  WARNING: SUPABASE_URL or SUPABASE_SERVICE_KEY not set. Feed endpoints will not work.")
 
 
+# Bounds how many Supabase calls one worker runs in threads at once
+_db_semaphore = asyncio.Semaphore(10)
+
+
+async def run_query(query):
+    """Execute a supabase-py query off the event loop so several can overlap"""
+    async with _db_semaphore:
+        return await asyncio.to_thread(query.execute)
+
+
 def get_supabase() -> Client:
     """Get Supabase client or raise error if not configured"""
     if supabase is None:
@@ -43,6 +51,10 @@ def get_supabase() -> Client:
     return supabase
 
 
+# Upper bound on how many already-seen post ids one request filters out
+MAX_EXCLUDE_IDS = 1000
+
+
 class FeedRequest(BaseModel):
     exclude_ids: List[str] = []
     is_initial: bool = False
@@ -88,75 +100,62 @@ class FeedPost(BaseModel):
     items: List[FeedItem]
 
 
-def calculate_engagement_score(post_data: Dict) -> float:
-    """Calculate engagement score for ranking posts"""
-    like_count = post_data.get('like_count', 0)
-    comment_count = post_data.get('comment_count', 0)
+# Preference signals change over minutes, not requests. Cache them per user
+# for a minute; log_post_view drops the entry when the user records a view.
+# Single-process only, like the other in-memory caches.
+_signals_cache = TTLCache(maxsize=10_000, ttl=60)
+# One lock per user so concurrent misses share a single RPC
+_signals_locks = weakref.WeakValueDictionary()
 
-    # Recency boost - newer posts get higher scores
-    created_at = datetime.fromisoformat(post_data['created_at'].replace('Z', '+00:00'))
-    hours_old = (datetime.now(created_at.tzinfo) - created_at).total_seconds() / 3600
-    recency_multiplier = 1.0 / (1.0 + hours_old / 24)  # Decay over days
 
-    # Engagement score: likes (1 point) + comments (3 points) * recency
-    score = (like_count + (comment_count * 3)) * recency_multiplier
-
-    return score
+async def get_user_preference_signals(sb: Client, user_id: str) -> Dict:
+    """
+    Analyze user behavior to understand preferences.
+    The aggregation runs in Postgres (get_user_preference_signals RPC), so
+    this is a single round-trip, and results are cached for a minute.
+    """
+    signals = _signals_cache.get(user_id)
+    if signals is not None:
+        return signals
+
+    lock = _signals_locks.setdefault(user_id, asyncio.Lock())
+    async with lock:
+        signals = _signals_cache.get(user_id)
+        if signals is not None:
+            return signals
+
+        signals = {
+            'followed_users': [],
+            'engaged_creators': [],
+            'recent_interactions': [],
+            'avg_view_time': 0
+        }
 
+        try:
+            response = await run_query(sb.rpc('get_user_preference_signals', {'p_user_id': user_id}))
+            if response and response.data:
+                signals.update(response.data)
+            _signals_cache[user_id] = signals
 
-def get_user_preference_signals(sb: Client, user_id: str) -> Dict:
-    """Analyze user behavior to understand preferences"""
-    signals = {
-        'followed_users': [],
-        'engaged_creators': [],
-        'recent_interactions': [],
-        'avg_view_time': 0
-    }
+        except Exception as e:
+            # Not cached, so the next request retries
+            print(f"Error getting preference signals: {e}")
 
-    try:
-        # Get followed users
-        following_response = sb.table('followers').select('following_id').eq('follower_id', user_id).limit(
-            200).execute()
-        if following_response and following_response.data:
-            signals['followed_users'] = [f['following_id'] for f in following_response.data]
-
-        # Get recent post views (last 100)
-        views_response = sb.table('post_views').select('post_id, time_spent_ms, interacted, viewed_at').eq('user_id',
-                                                                                                           user_id).order(
-            'viewed_at', desc=True).limit(100).execute()
-
-        if views_response and views_response.data:
-            # Calculate average view time
-            total_time = sum(v.get('time_spent_ms', 0) for v in views_response.data)
-            signals['avg_view_time'] = total_time / len(views_response.data) if views_response.data else 0
-
-            # Get posts where user spent >3 seconds or interacted
-            engaged_posts = [
-                v['post_id'] for v in views_response.data
-                if v.get('interacted') or v.get('time_spent_ms', 0) > 3000
-            ]
-
-            # Get creators of engaged posts
-            if engaged_posts:
-                engaged_posts_response = sb.table('feed_posts').select('owner_id').in_('id',
-                                                                                       engaged_posts[:50]).execute()
-                if engaged_posts_response and engaged_posts_response.data:
-                    # Count frequency of each creator
-                    creator_counts = {}
-                    for post in engaged_posts_response.data:
-                        creator_id = post['owner_id']
-                        creator_counts[creator_id] = creator_counts.get(creator_id, 0) + 1
-
-                    # Sort by frequency
-                    signals['engaged_creators'] = sorted(creator_counts.keys(), key=lambda x: creator_counts[x],
-                                                         reverse=True)
-
-            signals['recent_interactions'] = engaged_posts[:20]
+        return signals
 
-    except Exception as e:
-        print(f"Error getting preference signals: {e}")
 
-    return signals
+async def pick_feed_post(sb: Client, strategy: str, exclude_ids: List[str], signals: Dict) -> Optional[Dict]:
+    """
+    Rank candidates and pick one in Postgres (pick_feed_post RPC).
+    Returns {"post": ..., "total_fetched": n} or None if nothing matched.
+    """
+    response = await run_query(sb.rpc('pick_feed_post', {
+        'p_strategy': strategy,
+        'p_exclude_ids': exclude_ids,
+        'p_followed_ids': signals['followed_users'][:50],
+        'p_engaged_creators': signals['engaged_creators'][:30],
+    }))
+    return response.data if response and response.data else None
 
 
 @router.post("/feed/next")
@@ -171,13 +170,14 @@ async def get_next_feed_post(request: FeedRequest):
     try:
         sb = get_supabase()
         user_id = request.user_id
-        exclude_ids = request.exclude_ids
+        # Most recent ids only
+        exclude_ids = request.exclude_ids[-MAX_EXCLUDE_IDS:]
         is_initial = request.is_initial
 
         # Get user preference signals
         signals = {'followed_users': [], 'engaged_creators': [], 'avg_view_time': 0}
         if user_id:
-            signals = get_user_preference_signals(sb, user_id)
+            signals = await get_user_preference_signals(sb, user_id)
 
         # Determine content strategy with more variety
         strategies = []
@@ -189,115 +189,69 @@ async def get_next_feed_post(request: FeedRequest):
             strategies.append(('engaged_creators', 30))  # 30% from creators you engage with
 
         strategies.append(('popular', 20))  # 20% popular/trending content
-        strategies.append(('discovery', 10))  # 10% pure discovery (random new creators)
+        # 10% pure discovery (random new creators), plus whatever share the
+        # missing strategies above would have had
+        strategies.append(('discovery', 100 - sum(weight for _, weight in strategies)))
 
         # Weighted random selection
-        rand = random.random() * 100
-        cumulative = 0
-        selected_strategy = 'discovery'
-
-        for strategy, weight in strategies:
-            cumulative += weight
-            if rand <= cumulative:
-                selected_strategy = strategy
-                break
-
-        # Build query based on strategy
-        query = sb.table('feed_posts').select(
-            'id, image_url, caption, like_count, comment_count, music_preview_url, owner_id, created_at, '
-            'profiles!feed_posts_owner_id_fkey(id, username, avatar_url, is_verified)'
-        )
+        selected_strategy = random.choices(
+            [strategy for strategy, _ in strategies],
+            weights=[weight for _, weight in strategies],
+            k=1
+        )[0]
+
+        # Filter, rank and pick in one round-trip. A second pass without
+        # exclusions recirculates content once everything has been seen.
+        picked = None
+        for attempt in range(2):
+            if attempt == 1:
+                if not exclude_ids:
+                    break
+                # All posts seen! Reset exclude list and recirculate
+                print(f"🔄 All content seen ({len(exclude_ids)} posts). Recirculating...")
+                exclude_ids = []
 
-        # Apply strategy filters
-        if selected_strategy == 'followed' and signals['followed_users']:
-            query = query.in_('owner_id', signals['followed_users'][:50])
-        elif selected_strategy == 'engaged_creators' and signals['engaged_creators']:
-            query = query.in_('owner_id', signals['engaged_creators'][:30])
-        elif selected_strategy == 'popular':
-            # Get posts with high engagement
-            query = query.gte('like_count', 1)  # At least 1 like
-        # 'discovery' has no filter - completely random
-
-        # Exclude recently seen posts (if list is manageable)
-        # Only exclude if we haven't seen too many (to allow recirculation)
-        if len(exclude_ids) > 0 and len(exclude_ids) <= 20:
-            # For small exclude lists, filter them out
-            for post_id in exclude_ids:
-                query = query.neq('id', post_id)
-
-        # Fetch candidates (get more for better selection)
-        fetch_limit = 20 if selected_strategy != 'discovery' else 50
-        query = query.order('created_at', desc=True).limit(fetch_limit)
-
-        posts_response = query.execute()
-
-        # If no posts found with filters, try without filters (fallback to all posts)
-        if (not posts_response or not posts_response.data) and selected_strategy != 'discovery':
-            print(f"⚠️ No posts found with strategy '{selected_strategy}'. Falling back to all posts...")
-
-            # Build fresh query without strategy filters
-            query = sb.table('feed_posts').select(
-                'id, image_url, caption, like_count, comment_count, music_preview_url, owner_id, created_at, '
-                'profiles!feed_posts_owner_id_fkey(id, username, avatar_url, is_verified)'
-            )
+            picked = await pick_feed_post(sb, selected_strategy, exclude_ids, signals)
 
-            # Still respect exclude_ids if reasonable
-            if len(exclude_ids) > 0 and len(exclude_ids) <= 20:
-                for post_id in exclude_ids:
-                    query = query.neq('id', post_id)
+            # If no posts found with filters, try without filters (fallback to all posts)
+            if not picked and selected_strategy != 'discovery':
+                print(f"⚠️ No posts found with strategy '{selected_strategy}'. Falling back to all posts...")
+                selected_strategy = 'discovery'
+                picked = await pick_feed_post(sb, selected_strategy, exclude_ids, signals)
 
-            query = query.order('created_at', desc=True).limit(50)
-            posts_response = query.execute()
+            if picked:
+                break
 
-        # If STILL no posts found AND we're excluding posts, reset and recirculate
-        if not posts_response or not posts_response.data:
-            if len(exclude_ids) > 0:
-                # All posts seen! Reset exclude list and recirculate
-                print(f"🔄 All content seen ({len(exclude_ids)} posts). Recirculating...")
-                return await get_next_feed_post(FeedRequest(exclude_ids=[], is_initial=False, user_id=user_id))
+        if not picked:
             # Truly no posts available
             return {"post": None, "message": "No posts available"}
 
-        # Score and rank posts
-        scored_posts = []
-        for post in posts_response.data:
-            score = calculate_engagement_score(post)
-            scored_posts.append((post, score))
-
-        # Sort by score (highest first)
-        scored_posts.sort(key=lambda x: x[1], reverse=True)
+        selected_post = picked['post']
 
-        # Select from top candidates with some randomness
-        # Pick from top 5 to avoid always showing the exact same order
-        top_candidates = scored_posts[:min(5, len(scored_posts))]
-        selected_post = random.choice(top_candidates)[0] if top_candidates else scored_posts[0][0]
-
-        # Get fresh like/save status for current user
+        # Like/save status and the post's items are independent lookups
         is_liked = False
         is_saved = False
 
+        # ← Added is_monetized to select
+        # For signed-in users the user's own likes are embedded (left join),
+        # so each item carries its liked flag without a second lookup
+        item_columns = 'id, title, image_url, product_url, price, seller, like_count, is_monetized'
         if user_id:
-            liked_response = sb.table('liked_feed_posts').select('feed_post_id').eq('user_id', user_id).eq(
-                'feed_post_id', selected_post['id']).maybe_single().execute()
-            saved_response = sb.table('saved_feed_posts').select('feed_post_id').eq('user_id', user_id).eq(
-                'feed_post_id', selected_post['id']).maybe_single().execute()
+            item_columns += ', liked_feed_post_items(user_id)'
+        items_query = sb.table('feed_post_items').select(item_columns).eq('feed_post_id', selected_post['id'])
 
-            is_liked = bool(liked_response.data) if liked_response else False
-            is_saved = bool(saved_response.data) if saved_response else False
+        if user_id:
+            items_query = items_query.eq('liked_feed_post_items.user_id', user_id)
+            status_response, items_response = await asyncio.gather(
+                run_query(sb.rpc('liked_saved_status', {'p_user': user_id, 'p_post': selected_post['id']})),
+                run_query(items_query)
+            )
 
-        # ← Added is_monetized to select
-        items_response = sb.table('feed_post_items').select(
-            'id, title, image_url, product_url, price, seller, like_count, is_monetized').eq('feed_post_id',
-                                                                               selected_post['id']).execute()
-
-        # Get liked items for current user
-        liked_item_ids = set()
-        if user_id and items_response and items_response.data:
-            item_ids = [item['id'] for item in items_response.data]
-            liked_items_response = sb.table('liked_feed_post_items').select('item_id').eq('user_id', user_id).in_(
-                'item_id', item_ids).execute()
-            if liked_items_response and liked_items_response.data:
-                liked_item_ids = {like['item_id'] for like in liked_items_response.data}
+            if status_response and status_response.data:
+                is_liked = bool(status_response.data[0]['is_liked'])
+                is_saved = bool(status_response.data[0]['is_saved'])
+        else:
+            items_response = await run_query(items_query)
 
         # ← Added is_monetized to FeedItem constructor
         items = [
@@ -309,7 +263,7 @@ async def get_next_feed_post(request: FeedRequest):
                 price=item.get('price'),
                 seller=item.get('seller'),
                 like_count=item.get('like_count', 0),
-                is_liked=item['id'] in liked_item_ids,
+                is_liked=bool(item.get('liked_feed_post_items')),
                 is_monetized=item.get('is_monetized', False)  # ← NEW
             )
             for item in (items_response.data if items_response and items_response.data else [])
@@ -345,8 +299,8 @@ async def get_next_feed_post(request: FeedRequest):
             "post": feed_post.dict(),
             "algorithm_info": {
                 "strategy": selected_strategy,
-                "candidates_evaluated": len(scored_posts),
-                "total_fetched": len(posts_response.data)
+                "candidates_evaluated": picked['total_fetched'],
+                "total_fetched": picked['total_fetched']
             }
         }
 
@@ -355,6 +309,61 @@ async def get_next_feed_post(request: FeedRequest):
         raise HTTPException(status_code=500, detail=f"Failed to fetch feed post: {str(e)}")
 
 
+class ViewBatcher:
+    """
+    Coalesces post_views upserts. Views submitted within `window` seconds of
+    each other (up to `max_batch`) are written with a single upsert by a
+    background task. Fire-and-forget: queued views are lost if the process
+    exits before they're flushed.
+    """
+
+    def __init__(self, max_batch: int = 100, window: float = 0.05):
+        self.max_batch = max_batch
+        self.window = window
+        self._queue: asyncio.Queue = asyncio.Queue()
+        self._task: Optional[asyncio.Task] = None
+
+    async def submit(self, record: Dict):
+        # Started lazily so it runs on the server's event loop
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+        await self._queue.put(record)
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self._queue.get()]
+            deadline = loop.time() + self.window
+            while len(batch) < self.max_batch:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+            await self.flush(batch)
+
+    async def flush(self, batch: List[Dict]):
+        # One upsert can't touch the same row twice; keep each pair's latest view
+        rows = {(r['user_id'], r['post_id']): r for r in batch}
+        try:
+            await run_query(get_supabase().table('post_views').upsert(
+                list(rows.values()),
+                on_conflict='user_id,post_id'
+            ))
+        except Exception as e:
+            print(f"Log view batch error ({len(rows)} views): {str(e)}")
+            return
+
+        # New interactions, recompute signals on the next feed request
+        for user_id, _ in rows:
+            _signals_cache.pop(user_id, None)
+
+
+view_batcher = ViewBatcher()
+
+
 @router.post("/feed/log-view")
 async def log_post_view(request: LogViewRequest):
     """
@@ -362,7 +371,7 @@ async def log_post_view(request: LogViewRequest):
     Tracks time spent and interaction status
     """
     try:
-        sb = get_supabase()
+        get_supabase()
 
         # Upsert post view
         data = {
@@ -373,12 +382,10 @@ async def log_post_view(request: LogViewRequest):
             "interacted": request.interacted
         }
 
-        response = sb.table('post_views').upsert(
-            data,
-            on_conflict='user_id,post_id'
-        ).execute()
+        # Written in batches by view_batcher
+        await view_batcher.submit(data)
 
-        return {"success": True, "data": response.data}
+        return {"success": True}
 
     except Exception as e:
         print(f"Log view error: {str(e)}")
@@ -393,7 +400,7 @@ async def get_user_preferences(user_id: str):
     try:
         sb = get_supabase()
 
-        signals = get_user_preference_signals(sb, user_id)
+        signals = await get_user_preference_signals(sb, user_id)
 
         return {
             "user_id": user_id,
@@ -1,19 +1,45 @@
 from fastapi import APIRouter, HTTPException
 from pydantic import BaseModel
-from supabase import create_client, Client
-import openai
+from typing import List, Literal
+from supabase import AsyncClient
+from postgrest.exceptions import APIError
+from cachetools import TTLCache
+from openai import AsyncOpenAI
+from PIL import Image
 import os
-import json
-from backend.config import NEXT_PUBLIC_SUPABASE_URL, SUPABASE_SERVICE_ROLE_KEY, OPENAI_API_KEY
+import orjson
+import asyncio
+import base64
+import hashlib
+import io
+import uuid
+from datetime import datetime, timedelta, timezone
+from urllib.parse import urlparse
+import httpx
+from backend.config import OPENAI_API_KEY, NEXT_PUBLIC_SUPABASE_URL, LOG_TOKEN_USAGE
+from backend.catalogs.supabase_client import get_async_supabase_admin
+from backend.catalogs.helpers import image_is_safe, batch_image_is_safe, download_image, check_image_size
+from backend.catalogs.base_functions import invalidate_catalog_cache
 
 router = APIRouter()
 
 # Initialize clients
-SUPABASE_URL = NEXT_PUBLIC_SUPABASE_URL
-SUPABASE_SERVICE_KEY = SUPABASE_SERVICE_ROLE_KEY
-supabase: Client = create_client(SUPABASE_URL, SUPABASE_SERVICE_KEY)
 
-openai.api_key = OPENAI_API_KEY
+# Shared pool for OpenAI calls and private image downloads
+http_client = httpx.AsyncClient(
+    limits=httpx.Limits(max_keepalive_connections=20, keepalive_expiry=30)
+)
+
+# Bounded retries/timeout so a slow model call can't hold a request forever
+client = AsyncOpenAI(api_key=OPENAI_API_KEY, max_retries=2, timeout=20.0, http_client=http_client)
+
+
+async def db() -> AsyncClient:
+    """Async service-role Supabase client (pooled HTTP/2 connections)"""
+    sb = await get_async_supabase_admin()
+    if sb is None:
+        raise HTTPException(status_code=500, detail="Supabase not configured")
+    return sb
 
 
 class CreateItemRequest(BaseModel):
@@ -24,6 +50,7 @@ class CreateItemRequest(BaseModel):
     seller: str | None = None
     price: str | None = None
     user_id: str
+    client_ref: str | None = None  # Echoed back by the bulk endpoint
 
 
 class CreateItemResponse(BaseModel):
@@ -33,100 +60,308 @@ class CreateItemResponse(BaseModel):
     metadata: dict | None = None
 
 
-async def categorize_item(title: str, image_url: str, product_url: str | None, price: str | None) -> dict:
+class CategorizationResult(BaseModel):
+    """Structured output schema for categorize_item"""
+    safe: bool
+    safety_reason: str | None
+    is_fashion_item: bool
+    category: Literal[
+        "tops", "bottoms", "outerwear", "shoes", "accessories", "dresses",
+        "activewear", "bags", "jewelry", "eyewear", "watches", "other"
+    ]
+    subcategory: str
+    brand: str | None
+    product_type: Literal["casual", "formal", "athletic", "streetwear", "luxury"]
+    colors: List[str]
+    primary_color: str
+    material: str | None
+    pattern: str | None
+    style_tags: List[str]
+    season: Literal["spring", "summer", "fall", "winter", "all-season"]
+    formality: Literal["casual", "business-casual", "formal", "athletic"]
+    gender: Literal["men", "women", "unisex"]
+    fit_type: Literal["slim", "regular", "oversized"] | None
+    occasion_tags: List[str]
+    price_tier: Literal["budget", "mid-range", "luxury"] | None
+    confidence: float
+
+
+# Static so every call shares the same prompt prefix, which OpenAI caches
+# automatically. Anything per-item belongs in the user message.
+CATEGORIZATION_SYSTEM_PROMPT = """You are a fashion expert AI. Categorize fashion items with precision.
+First decide safe: false if the image or title contains nudity, sexual content, violence, gore, hate symbols or other content unfit for a public shopping catalog, with a short safety_reason; otherwise true and safety_reason null.
+Then decide is_fashion_item: anything wearable counts (clothing, footwear, bags, accessories, jewelry, eyewear, watches, hair accessories, wearable tech). Furniture, food, other electronics, home decor, cars etc. do not.
+If it is not fashion, still fill the other fields with best guesses."""
+
+
+def categorization_messages(title: str, image_url: str, product_url: str | None, price: str | None) -> list:
+    user_prompt = f"""TITLE: {title}
+PRICE: {price or 'Unknown'}
+URL: {product_url or 'Not provided'}"""
+
+    return [
+        {"role": "system", "content": CATEGORIZATION_SYSTEM_PROMPT},
+        {
+            "role": "user",
+            "content": [
+                {"type": "text", "text": user_prompt},
+                # Low detail is a flat, small token cost and plenty for categorizing
+                {"type": "image_url", "image_url": {"url": image_url, "detail": "low"}}
+            ]
+        }
+    ]
+
+
+async def request_categorization(title: str, image_url: str, product_url: str | None, price: str | None) -> dict:
     """
-    Categorize item using AI and verify it's actually a fashion item.
-    Returns metadata dict with is_fashion_item flag.
+    Ask the model to categorize the item. Raises on API errors or refusals.
+    The field set and allowed values come from CategorizationResult.
+    """
+    response = await client.chat.completions.parse(
+        model="gpt-4o-mini",
+        messages=categorization_messages(title, image_url, product_url, price),
+        max_tokens=500,
+        temperature=0.3,
+        response_format=CategorizationResult
+    )
+
+    # Prompt caching only starts at 1024 shared prefix tokens; this shows
+    # whether a call got any
+    if LOG_TOKEN_USAGE and response.usage:
+        details = response.usage.prompt_tokens_details
+        cached_tokens = details.cached_tokens if details and details.cached_tokens else 0
+        print(f"🧾 Categorization prompt tokens: {response.usage.prompt_tokens} ({cached_tokens} cached)")
+
+    result = response.choices[0].message.parsed
+    if result is None:
+        raise ValueError(f"Model refused to categorize: {response.choices[0].message.refusal}")
+
+    return result.dict()
+
+
+# Metadata returned when categorization fails
+DEFAULT_METADATA = {
+    "safe": None,  # Unknown; create_catalog_item falls back to the moderation endpoint
+    "safety_reason": None,
+    "is_fashion_item": True,  # Assume it's fashion on error to not block legitimate items
+    "category": "other",
+    "subcategory": "unknown",
+    "brand": None,
+    "product_type": "casual",
+    "colors": ["unknown"],
+    "primary_color": "unknown",
+    "material": None,
+    "pattern": None,
+    "style_tags": ["uncategorized"],
+    "season": "all-season",
+    "formality": "casual",
+    "gender": "unisex",
+    "fit_type": None,
+    "occasion_tags": ["everyday"],
+    "price_tier": None,
+    "confidence": 0.0
+}
+
+
+# Repeat items (same title, image and product URL) skip the model. First tier
+# is in-process, second is the item_categorizations table shared by workers.
+_categorization_cache = TTLCache(maxsize=5000, ttl=3600)
+
+# Stored results older than this are recomputed (and purged by pg_cron)
+CATEGORIZATION_TTL = timedelta(days=30)
+
+# Model calls in flight, by categorization key
+_inflight_categorizations: dict = {}
+
+# Callers waiting on each in-flight call; the last one to give up cancels it
+_inflight_waiters: dict = {}
+
+# Strong references so fire-and-forget tasks aren't garbage collected mid-flight
+_background_tasks: set = set()
+
+
+def categorization_key(title: str, image_url: str, product_url: str | None) -> str:
+    return hashlib.sha256(f"{title}|{image_url}|{product_url}".encode()).hexdigest()
+
+
+# Only our own project's storage is ever downloaded server-side
+SUPABASE_HOST = urlparse(NEXT_PUBLIC_SUPABASE_URL or "").hostname
+
+
+def is_private_storage_url(image_url: str) -> bool:
+    """Signed URLs on this project's Supabase Storage point at private buckets"""
+    parsed = urlparse(image_url)
+    return (
+        SUPABASE_HOST is not None
+        and parsed.scheme == "https"
+        and parsed.hostname == SUPABASE_HOST
+        and parsed.path.startswith("/storage/v1/object/sign/")
+    )
+
+
+# Longest side of images we send inline; the model sees them at low detail anyway
+MODEL_IMAGE_MAX_SIZE = 768
+
+
+def shrink_image(data: bytes) -> bytes:
+    """Downscale to MODEL_IMAGE_MAX_SIZE and re-encode as JPEG"""
+    with Image.open(io.BytesIO(data)) as img:
+        check_image_size(img)
+        img.thumbnail((MODEL_IMAGE_MAX_SIZE, MODEL_IMAGE_MAX_SIZE))
+        buf = io.BytesIO()
+        img.convert("RGB").save(buf, "JPEG", quality=82)
+    return buf.getvalue()
+
+
+async def image_for_model(image_url: str) -> str:
+    """
+    Public URLs are passed through for OpenAI to fetch. Private (signed) URLs
+    are downloaded here once, shrunk, and sent inline, so OpenAI doesn't have
+    to fetch them on every call.
     """
+    if not is_private_storage_url(image_url):
+        return image_url
+
+    data = await download_image(image_url)
+    b64 = base64.b64encode(await asyncio.to_thread(shrink_image, data)).decode()
+    return f"data:image/jpeg;base64,{b64}"
+
+
+async def lookup_categorization(key: str) -> dict | None:
+    """Cached metadata for a categorization key, or None"""
+    metadata = _categorization_cache.get(key)
+    if metadata is not None:
+        return metadata
+
     try:
-        system_prompt = """You are a fashion expert AI. Categorize fashion items with precision.
-IMPORTANT: First determine if this is actually a FASHION item. Fashion includes:
-- Clothing (shirts, pants, dresses, etc.)
-- Footwear (shoes, sneakers, boots, sandals)
-- Accessories (bags, belts, hats, scarves, gloves)
-- Jewelry (rings, necklaces, bracelets, earrings)
-- Eyewear (sunglasses, glasses)
-- Watches
-- Hair accessories
-- Any wearable fashion item
-
-NOT fashion: furniture, food, electronics (unless wearable tech like smartwatches), home decor, cars, etc.
-Return ONLY valid JSON, no markdown."""
-
-        user_prompt = f"""Analyze this item:
-
-TITLE: {title}
-PRICE: {price or 'Unknown'}
-URL: {product_url or 'Not provided'}
-
-Return JSON with:
-{{
-  "is_fashion_item": true/false (Is this a wearable fashion item?),
-  "category": "tops/bottoms/outerwear/shoes/accessories/dresses/activewear/bags/jewelry/eyewear/watches/other",
-  "subcategory": "specific type",
-  "brand": "brand name or null",
-  "product_type": "casual/formal/athletic/streetwear/luxury",
-  "colors": ["array"],
-  "primary_color": "main color",
-  "material": "material or null",
-  "pattern": "pattern or null",
-  "style_tags": ["tag1", "tag2"],
-  "season": "spring/summer/fall/winter/all-season",
-  "formality": "casual/business-casual/formal/athletic",
-  "gender": "men/women/unisex",
-  "fit_type": "slim/regular/oversized or null",
-  "occasion_tags": ["everyday", "work"],
-  "price_tier": "budget/mid-range/luxury or null",
-  "confidence": 0.95
-}}
-
-If is_fashion_item is false, still provide best-guess values for other fields but they won't be used."""
-
-        response = openai.chat.completions.create(
-            model="gpt-4o-mini",
-            messages=[
-                {"role": "system", "content": system_prompt},
-                {
-                    "role": "user",
-                    "content": [
-                        {"type": "text", "text": user_prompt},
-                        {"type": "image_url", "image_url": {"url": image_url}}
-                    ]
-                }
-            ],
-            max_tokens=500,
-            temperature=0.3,
-            response_format={"type": "json_object"}
+        sb = await db()
+        cached = await (
+            sb.table('item_categorizations').select('metadata').eq('key', key)
+            .gte('created_at', (datetime.now(timezone.utc) - CATEGORIZATION_TTL).isoformat())
+            .maybe_single().execute()
         )
+        if cached and cached.data:
+            metadata = cached.data['metadata']
+            _categorization_cache[key] = metadata
+            return metadata
+    except Exception as e:
+        print(f"Categorization cache lookup error: {e}")
+
+    return None
 
-        result = response.choices[0].message.content.strip()
-        if result.startswith("```json"):
-            result = result.replace("```json", "").replace("```", "").strip()
 
-        return json.loads(result)
+async def lookup_categorizations(keys: List[str]) -> dict:
+    """Cached metadata for many keys at once (one query for the misses), by key"""
+    found = {}
+    missing = []
+    for key in dict.fromkeys(keys):
+        metadata = _categorization_cache.get(key)
+        if metadata is not None:
+            found[key] = metadata
+        else:
+            missing.append(key)
 
+    if not missing:
+        return found
+
+    try:
+        sb = await db()
+        cached = await (
+            sb.table('item_categorizations').select('key, metadata').in_('key', missing)
+            .gte('created_at', (datetime.now(timezone.utc) - CATEGORIZATION_TTL).isoformat())
+            .execute()
+        )
+        for row in cached.data or []:
+            _categorization_cache[row['key']] = row['metadata']
+            found[row['key']] = row['metadata']
+    except Exception as e:
+        print(f"Categorization cache lookup error: {e}")
+
+    return found
+
+
+async def store_categorization(key: str, metadata: dict):
+    _categorization_cache[key] = metadata
+    try:
+        sb = await db()
+        await sb.table('item_categorizations').upsert({
+            'key': key,
+            'metadata': metadata,
+            'created_at': datetime.now(timezone.utc).isoformat()
+        }).execute()
+    except Exception as e:
+        print(f"Categorization cache store error: {e}")
+
+
+async def run_categorization(key: str, title: str, image_url: str, product_url: str | None, price: str | None) -> dict:
+    try:
+        model_image = await image_for_model(image_url)
+        metadata = await request_categorization(title, model_image, product_url, price)
     except Exception as e:
         print(f"Categorization error: {e}")
-        # Return default metadata on error
-        return {
-            "is_fashion_item": True,  # Assume it's fashion on error to not block legitimate items
-            "category": "other",
-            "subcategory": "unknown",
-            "brand": None,
-            "product_type": "casual",
-            "colors": ["unknown"],
-            "primary_color": "unknown",
-            "material": None,
-            "pattern": None,
-            "style_tags": ["uncategorized"],
-            "season": "all-season",
-            "formality": "casual",
-            "gender": "unisex",
-            "fit_type": None,
-            "occasion_tags": ["everyday"],
-            "price_tier": None,
-            "confidence": 0.0
-        }
+        # Return default metadata on error (not cached, so it's retried next time)
+        return dict(DEFAULT_METADATA)
+
+    await store_categorization(key, metadata)
+    return metadata
+
+
+async def categorize_item(title: str, image_url: str, product_url: str | None, price: str | None) -> dict:
+    """
+    Categorize item using AI and verify it's actually a fashion item.
+    Returns metadata dict with is_fashion_item flag.
+    Results are cached per (title, image_url, product_url), and concurrent
+    calls for the same item (e.g. a prefetch and the real add) share one
+    model call.
+    """
+    key = categorization_key(title, image_url, product_url)
+
+    metadata = await lookup_categorization(key)
+    if metadata is not None:
+        return metadata
+
+    task = _inflight_categorizations.get(key)
+    if task is None:
+        task = asyncio.create_task(run_categorization(key, title, image_url, product_url, price))
+        _inflight_categorizations[key] = task
+        task.add_done_callback(lambda _: _inflight_categorizations.pop(key, None))
+
+    # Shielded so one caller giving up doesn't cancel it for the others
+    _inflight_waiters[key] = _inflight_waiters.get(key, 0) + 1
+    try:
+        return await asyncio.shield(task)
+    except asyncio.CancelledError:
+        if _inflight_waiters.get(key) == 1:
+            task.cancel()
+        raise
+    finally:
+        remaining = _inflight_waiters.get(key, 1) - 1
+        if remaining:
+            _inflight_waiters[key] = remaining
+        else:
+            _inflight_waiters.pop(key, None)
+
+
+def metadata_columns(metadata: dict) -> dict:
+    """catalog_items columns filled from categorization metadata"""
+    return {
+        'category': metadata.get('category'),
+        'subcategory': metadata.get('subcategory'),
+        'brand': metadata.get('brand'),
+        'product_type': metadata.get('product_type'),
+        'colors': metadata.get('colors'),
+        'primary_color': metadata.get('primary_color'),
+        'material': metadata.get('material'),
+        'pattern': metadata.get('pattern'),
+        'style_tags': metadata.get('style_tags'),
+        'season': metadata.get('season'),
+        'formality': metadata.get('formality'),
+        'gender': metadata.get('gender'),
+        'fit_type': metadata.get('fit_type'),
+        'occasion_tags': metadata.get('occasion_tags'),
+        'price_tier': metadata.get('price_tier'),
+        'categorization_confidence': metadata.get('confidence')
+    }
 
 
 @router.post("/create-catalog-item", response_model=CreateItemResponse)
@@ -135,9 +370,9 @@ async def create_catalog_item(request: CreateItemRequest):
     ONE ENDPOINT TO RULE THEM ALL
 
     Does everything:
-    1. Verifies user owns catalog
-    2. Categorizes with AI (includes fashion item verification)
-    3. Inserts to database
+    1. Categorizes with AI (includes safety and fashion item verification),
+       cancelled early if a quick ownership probe fails
+    2. Inserts to database in one RPC that also verifies the user owns the catalog
 
     Accepts all fashion items: clothing, shoes, bags, accessories, jewelry, watches, eyewear, etc.
 
@@ -145,31 +380,50 @@ async def create_catalog_item(request: CreateItemRequest):
     """
 
     try:
-        # 1. Verify ownership
-        catalog = supabase.table('catalogs').select('owner_id').eq('id', request.catalog_id).single().execute()
-
-        if not catalog.data:
-            raise HTTPException(status_code=404, detail="Catalog not found")
-
-        if catalog.data['owner_id'] != request.user_id:
-            raise HTTPException(status_code=403, detail="You don't own this catalog")
-
-        # 2. Categorize with AI (includes fashion item check)
-        metadata = await categorize_item(
+        # 1. Categorize with AI (includes safety and fashion item checks).
+        #    Started first because it is by far the slowest step; a cheap
+        #    ownership probe runs meanwhile and cancels it on failure, so
+        #    requests for someone else's catalog don't pay for model work.
+        categorize_task = asyncio.create_task(categorize_item(
             title=request.title,
             image_url=request.image_url,
             product_url=request.product_url,
             price=request.price
-        )
+        ))
+
+        try:
+            sb = await db()
+            catalog = await (
+                sb.table('catalogs').select('owner_id').eq('id', request.catalog_id)
+                .maybe_single().execute()
+            )
+            if not catalog or not catalog.data:
+                raise HTTPException(status_code=404, detail="Catalog not found")
+            if catalog.data['owner_id'] != request.user_id:
+                raise HTTPException(status_code=403, detail="You don't own this catalog")
+        except BaseException:
+            categorize_task.cancel()
+            raise
+
+        metadata = await categorize_task
 
-        # 3. Verify it's actually a fashion item
+        # Categorization failed or predates the safety field; ask the moderation endpoint instead
+        is_safe = metadata.get('safe')
+        if is_safe is None:
+            is_safe = await image_is_safe(request.image_url)
+
+        if not is_safe:
+            raise HTTPException(status_code=400, detail="Image violates content guidelines")
+
+        # 2. Verify it's actually a fashion item
         if not metadata.get('is_fashion_item', True):
             raise HTTPException(
                 status_code=400,
                 detail="This doesn't appear to be a fashion item. Sourced is for fashion and wearable items only."
             )
 
-        # 4. Insert to database WITH metadata
+        # 3. Insert to database WITH metadata (the insert re-checks ownership,
+        #    so the probe above can't be raced)
         item_data = {
             'catalog_id': request.catalog_id,
             'title': request.title,
@@ -178,29 +432,24 @@ async def create_catalog_item(request: CreateItemRequest):
             'seller': request.seller,
             'price': request.price,
             # AI metadata
-            'category': metadata.get('category'),
-            'subcategory': metadata.get('subcategory'),
-            'brand': metadata.get('brand'),
-            'product_type': metadata.get('product_type'),
-            'colors': metadata.get('colors'),
-            'primary_color': metadata.get('primary_color'),
-            'material': metadata.get('material'),
-            'pattern': metadata.get('pattern'),
-            'style_tags': metadata.get('style_tags'),
-            'season': metadata.get('season'),
-            'formality': metadata.get('formality'),
-            'gender': metadata.get('gender'),
-            'fit_type': metadata.get('fit_type'),
-            'occasion_tags': metadata.get('occasion_tags'),
-            'price_tier': metadata.get('price_tier'),
-            'categorization_confidence': metadata.get('confidence')
+            **metadata_columns(metadata)
         }
 
-        result = supabase.table('catalog_items').insert(item_data).execute()
+        try:
+            sb = await db()
+            result = await sb.rpc('insert_catalog_item', {'p_user_id': request.user_id, 'p_item': item_data}).execute()
+        except APIError as e:
+            if e.code == 'P0002':
+                raise HTTPException(status_code=404, detail="Catalog not found")
+            if e.code == '42501':
+                raise HTTPException(status_code=403, detail="You don't own this catalog")
+            raise
 
         if not result.data:
             raise HTTPException(status_code=500, detail="Failed to create item")
 
+        invalidate_catalog_cache(request.catalog_id)
+
         return CreateItemResponse(
             success=True,
             item_id=result.data[0]['id'],
@@ -212,4 +461,374 @@ async def create_catalog_item(request: CreateItemRequest):
         raise
     except Exception as e:
         print(f"Error: {e}")
-        raise HTTPException(status_code=500, detail=str(e))
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=str(e))
+
+class PrefetchItem(BaseModel):
+    title: str
+    image_url: str
+    product_url: str | None = None
+    price: str | None = None
+
+
+class PrefetchRequest(BaseModel):
+    user_id: str
+    items: List[PrefetchItem]
+
+
+# Per call, so one client can't queue an unbounded number of model calls
+MAX_PREFETCH_ITEMS = 20
+
+# Per user; the count resets once PREFETCH_WINDOW seconds pass without a prefetch
+MAX_PREFETCH_PER_USER = 60
+PREFETCH_WINDOW = 60
+_prefetch_counts = TTLCache(maxsize=10000, ttl=PREFETCH_WINDOW)
+
+# Across all users: model calls at once, and prefetches waiting for one.
+# Past the backlog cap new prefetches are dropped; the add still categorizes.
+PREFETCH_CONCURRENCY = 8
+MAX_PREFETCH_BACKLOG = 100
+_prefetch_semaphore = asyncio.Semaphore(PREFETCH_CONCURRENCY)
+_prefetch_tasks: set = set()
+
+
+async def prefetch_item(item: PrefetchItem):
+    async with _prefetch_semaphore:
+        await categorize_item(
+            title=item.title,
+            image_url=item.image_url,
+            product_url=item.product_url,
+            price=item.price
+        )
+
+
+@router.post("/prefetch-categorization")
+async def prefetch_categorization(request: PrefetchRequest):
+    """
+    Start categorizing items the user is about to add (pasted list, hover,
+    while typing) without waiting for the results. A later
+    /create-catalog-item for the same title, image and product URL is served
+    from the cache, or joins the call still in flight.
+    Items already cached or in flight are skipped.
+    """
+    try:
+        sb = await db()
+        profile = await sb.table('profiles').select('id').eq('id', request.user_id).maybe_single().execute()
+    except Exception as e:
+        print(f"Prefetch user lookup error: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+    if not profile or not profile.data:
+        raise HTTPException(status_code=404, detail="User not found")
+
+    used = _prefetch_counts.get(request.user_id, 0)
+    budget = min(MAX_PREFETCH_ITEMS, MAX_PREFETCH_PER_USER - used)
+
+    queued = 0
+    for item in request.items:
+        if queued >= budget or len(_prefetch_tasks) >= MAX_PREFETCH_BACKLOG:
+            break
+        key = categorization_key(item.title, item.image_url, item.product_url)
+        if key in _categorization_cache or key in _inflight_categorizations:
+            continue
+
+        task = asyncio.create_task(prefetch_item(item))
+        _prefetch_tasks.add(task)
+        task.add_done_callback(_prefetch_tasks.discard)
+        queued += 1
+
+    if queued:
+        _prefetch_counts[request.user_id] = used + queued
+
+    return {"success": True, "queued": queued}
+
+
+class BulkCreateItemsResponse(BaseModel):
+    success: bool
+    batch_id: str | None = None
+    created: List[dict]
+    rejected: List[dict]
+
+
+# How often a submitted batch is checked for results
+BATCH_POLL_INTERVAL = 300
+
+# Signed-URL images downloaded at once while building a batch
+BATCH_INLINE_CONCURRENCY = 8
+
+# Batch statuses after which no more results will arrive
+BATCH_TERMINAL_STATUSES = ("completed", "failed", "expired", "cancelled")
+
+
+def categorization_response_format() -> dict:
+    """CategorizationResult as a strict json_schema response_format, for Batch API bodies"""
+    schema = CategorizationResult.model_json_schema()
+    schema["additionalProperties"] = False
+    return {
+        "type": "json_schema",
+        "json_schema": {"name": "CategorizationResult", "strict": True, "schema": schema}
+    }
+
+
+async def submit_categorization_batch(items: List[dict]) -> str:
+    """
+    Submit categorization for already-inserted pending rows through the Batch
+    API (half price, results within 24h). custom_id is the catalog_items id.
+    """
+    semaphore = asyncio.Semaphore(BATCH_INLINE_CONCURRENCY)
+
+    async def batch_line(item: dict) -> bytes:
+        # Signed URLs may expire before the batch runs, so those go inline.
+        # If the download fails the URL is sent as is rather than failing
+        # the whole batch.
+        try:
+            async with semaphore:
+                model_image = await image_for_model(item['image_url'])
+        except Exception as e:
+            print(f"Could not inline image for {item['id']}: {e}")
+            model_image = item['image_url']
+        return orjson.dumps({
+            "custom_id": item['id'],
+            "method": "POST",
+            "url": "/v1/chat/completions",
+            "body": {
+                "model": "gpt-4o-mini",
+                "messages": categorization_messages(item['title'], model_image, item['product_url'], item['price']),
+                "max_tokens": 500,
+                "temperature": 0.3,
+                "response_format": categorization_response_format()
+            }
+        })
+
+    lines = await asyncio.gather(*(batch_line(item) for item in items))
+
+    batch_file = await client.files.create(
+        file=("categorize.jsonl", b"\n".join(lines)),
+        purpose="batch"
+    )
+    batch = await client.batches.create(
+        input_file_id=batch_file.id,
+        endpoint="/v1/chat/completions",
+        completion_window="24h"
+    )
+    print(f"📦 Submitted categorization batch {batch.id} ({len(items)} items)")
+    return batch.id
+
+
+async def batch_item_ids(batch) -> List[str]:
+    """catalog_items ids a batch was submitted for (the custom_ids of its input file)"""
+    input_file = await client.files.content(batch.input_file_id)
+    return [orjson.loads(line)['custom_id'] for line in input_file.content.splitlines() if line.strip()]
+
+
+async def apply_categorization_batch(batch_id: str) -> str:
+    """
+    Write a finished batch's results to its pending rows. Unsafe and
+    non-fashion items are deleted, and so are rows the batch ended without a
+    usable result for (failed, expired or cancelled batches, errored lines).
+    Safe to call repeatedly. Returns the batch status.
+    """
+    batch = await client.batches.retrieve(batch_id)
+    if batch.status not in BATCH_TERMINAL_STATUSES:
+        return batch.status
+
+    # Expired and cancelled batches can still carry partial output
+    results = {}
+    if batch.output_file_id:
+        output = await client.files.content(batch.output_file_id)
+        for line in output.content.splitlines():
+            if not line.strip():
+                continue
+            entry = orjson.loads(line)
+            try:
+                content = entry['response']['body']['choices'][0]['message']['content']
+                results[entry['custom_id']] = CategorizationResult.model_validate_json(content).dict()
+            except Exception as e:
+                print(f"Batch {batch_id}: no result for {entry.get('custom_id')}: {e}")
+
+    item_ids = await batch_item_ids(batch)
+    if not item_ids:
+        return batch.status
+
+    sb = await db()
+    pending = await (
+        sb.table('catalog_items').select('id, catalog_id, title, image_url, product_url')
+        .in_('id', item_ids).eq('pending_categorization', True).execute()
+    )
+
+    rejected_ids = []
+    unresolved_ids = []
+    stores = []
+    updates = []
+    for row in pending.data or []:
+        metadata = results.get(row['id'])
+        if metadata is None:
+            unresolved_ids.append(row['id'])
+            continue
+        stores.append(store_categorization(
+            categorization_key(row['title'], row['image_url'], row['product_url']), metadata
+        ))
+        if not metadata['safe'] or not metadata['is_fashion_item']:
+            rejected_ids.append(row['id'])
+            continue
+        updates.append(
+            sb.table('catalog_items')
+            .update({**metadata_columns(metadata), 'pending_categorization': False})
+            .eq('id', row['id']).execute()
+        )
+
+    await asyncio.gather(*stores, *updates)
+    if rejected_ids or unresolved_ids:
+        await sb.table('catalog_items').delete().in_('id', rejected_ids + unresolved_ids).execute()
+
+    for catalog_id in {row['catalog_id'] for row in pending.data or []}:
+        invalidate_catalog_cache(catalog_id)
+
+    print(
+        f"✅ Batch {batch_id} ({batch.status}): {len(updates)} items categorized, "
+        f"{len(rejected_ids)} removed, {len(unresolved_ids)} without a result"
+    )
+    return batch.status
+
+
+async def poll_categorization_batch(batch_id: str):
+    """Background task: apply the batch once it finishes"""
+    while True:
+        await asyncio.sleep(BATCH_POLL_INTERVAL)
+        try:
+            status = await apply_categorization_batch(batch_id)
+        except Exception as e:
+            print(f"Batch {batch_id} poll error: {e}")
+            continue
+        if status in BATCH_TERMINAL_STATUSES:
+            print(f"📦 Batch {batch_id} finished with status {status}")
+            return
+
+
+@router.post("/create-catalog-items-bulk", response_model=BulkCreateItemsResponse)
+async def create_catalog_items_bulk(requests: List[CreateItemRequest]):
+    """
+    Bulk version of /create-catalog-item for imports that don't need results
+    right away.
+
+    Items whose categorization is already cached are inserted complete (or
+    rejected) immediately. The rest have their images moderated first, then
+    are inserted with pending_categorization and categorized through the
+    OpenAI Batch API; non-fashion ones, and any the batch doesn't return a
+    result for, are removed when it finishes. Ownership is checked per row,
+    as in the single endpoint, but all rows go in with one INSERT.
+
+    Returns: created items (with a pending flag), rejected items and the batch
+    id. Entries carry the request's index and client_ref for matching.
+    """
+
+    try:
+        keys = [categorization_key(r.title, r.image_url, r.product_url) for r in requests]
+        cached = await lookup_categorizations(keys)
+
+        created = []
+        rejected = []
+        to_insert = []
+        for index, (request, key) in enumerate(zip(requests, keys)):
+            metadata = cached.get(key)
+            ref = {"index": index, "client_ref": request.client_ref}
+            item_data = {
+                # Generated here so results can be matched without relying on row order
+                'id': str(uuid.uuid4()),
+                'catalog_id': request.catalog_id,
+                'title': request.title,
+                'image_url': request.image_url,
+                'product_url': request.product_url,
+                'seller': request.seller,
+                'price': request.price,
+            }
+
+            # Only trust cached results that carry a safety verdict
+            if metadata is not None and metadata.get('safe') is not None:
+                if not metadata['safe']:
+                    rejected.append({**ref, "error": "Image violates content guidelines"})
+                    continue
+                if not metadata.get('is_fashion_item', True):
+                    rejected.append({**ref, "error": "Not a fashion item"})
+                    continue
+                item_data.update(metadata_columns(metadata))
+            else:
+                item_data['pending_categorization'] = True
+
+            to_insert.append((ref, request, item_data))
+
+        # Pending rows are visible as soon as they're inserted, so their
+        # images are moderated now rather than when the batch comes back
+        unmoderated = [item_data['image_url'] for _, _, item_data in to_insert if item_data.get('pending_categorization')]
+        verdicts = dict(zip(unmoderated, await batch_image_is_safe(unmoderated)))
+        moderated = []
+        for ref, request, item_data in to_insert:
+            if not verdicts.get(item_data['image_url'], True):
+                rejected.append({**ref, "error": "Image violates content guidelines"})
+                continue
+            moderated.append((ref, request, item_data))
+        to_insert = moderated
+
+        # One multi-row INSERT; rows whose catalog the user doesn't own are skipped
+        inserted_ids = set()
+        if to_insert:
+            sb = await db()
+            result = await sb.rpc('insert_catalog_items', {
+                'p_items': [{'user_id': request.user_id, 'item': item_data} for _, request, item_data in to_insert]
+            }).execute()
+            inserted_ids = {row['id'] for row in result.data or []}
+
+        pending = []
+        for ref, request, item_data in to_insert:
+            if item_data['id'] not in inserted_ids:
+                rejected.append({**ref, "error": "You don't own this catalog"})
+                continue
+
+            is_pending = bool(item_data.get('pending_categorization'))
+            created.append({**ref, "item_id": item_data['id'], "pending": is_pending})
+            if is_pending:
+                pending.append(item_data)
+
+        batch_id = None
+        if pending:
+            try:
+                batch_id = await submit_categorization_batch(pending)
+                task = asyncio.create_task(poll_categorization_batch(batch_id))
+                _background_tasks.add(task)
+                task.add_done_callback(_background_tasks.discard)
+            except Exception as e:
+                # Nothing would ever categorize these rows, so take them back out
+                print(f"Batch submit error ({len(pending)} items): {e}")
+                pending_ids = {item_data['id'] for item_data in pending}
+                await sb.table('catalog_items').delete().in_('id', list(pending_ids)).execute()
+                rejected.extend(
+                    {"index": entry["index"], "client_ref": entry["client_ref"], "error": "Categorization unavailable, try again later"}
+                    for entry in created if entry["item_id"] in pending_ids
+                )
+                created = [entry for entry in created if entry["item_id"] not in pending_ids]
+
+        for catalog_id in {item_data['catalog_id'] for _, _, item_data in to_insert if item_data['id'] in inserted_ids}:
+            invalidate_catalog_cache(catalog_id)
+
+        return BulkCreateItemsResponse(
+            success=True,
+            batch_id=batch_id,
+            created=created,
+            rejected=rejected
+        )
+
+    except Exception as e:
+        print(f"Bulk create error: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.get("/create-catalog-items-bulk/{batch_id}")
+async def get_bulk_categorization_status(batch_id: str):
+    """
+    Check a categorization batch, applying its results if it has finished.
+    Also recovers batches whose poller was lost to a restart.
+    """
+    try:
+        status = await apply_categorization_batch(batch_id)
+        return {"batch_id": batch_id, "status": status}
+    except Exception as e:
+        print(f"Batch status error: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
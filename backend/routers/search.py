@@ -1,7 +1,10 @@
 from fastapi import APIRouter, File, UploadFile
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, Response
 from typing import List
 from pydantic import BaseModel
+import asyncio
+import orjson
+import random
 import sys
 from pathlib import Path
 
@@ -12,18 +15,34 @@ from backend.imageSearch.backupSearch.main_utils.image_to_web import fe_image_to
 
 router = APIRouter()
 
+# Each search holds a worker thread through a storage upload, a gpt-4o call
+# and a Firecrawl request; cap how many run at once per worker so bursts
+# don't drain the threadpool or trip the OpenAI/Firecrawl rate limits
+MAX_CONCURRENT_SEARCHES = 4
+_search_semaphore = asyncio.Semaphore(MAX_CONCURRENT_SEARCHES)
+
+# Upper bound (seconds) of the random delay that desynchronizes burst arrivals
+SEARCH_JITTER = 0.1
+
 class Product(BaseModel):
     name: str
     seller: str
     image_url: str
     item_url: str
 
-@router.post("/search", response_model=List[Product])
-def search(file: UploadFile = File(...)):
+@router.post("/search", response_model=None, responses={200: {"model": List[Product]}})
+async def search(file: UploadFile = File(...)):
     try:
-        image_bytes = file.file.read()
-        items = fe_image_to_search(image_bytes)
-
+        # Hand over the spooled upload itself rather than a bytes copy. The
+        # pipeline is all blocking HTTP (storage upload, OpenAI, Firecrawl
+        # via requests), so it gets a worker thread while this loop keeps
+        # serving requests.
+        await asyncio.sleep(random.uniform(0, SEARCH_JITTER))
+        async with _search_semaphore:
+            items = await asyncio.to_thread(fe_image_to_search, file.file)
+
+        # Every field is already a plain string, so serialize once here
+        # instead of having FastAPI validate and re-encode each Product
         products = [
             {
                 "name": item.get("name", ""),
@@ -34,7 +53,7 @@ def search(file: UploadFile = File(...)):
             for item in items
         ]
 
-        return products
+        return Response(content=orjson.dumps(products), media_type="application/json")
 
     except Exception as e:
         import traceback
@@ -4,6 +4,11 @@ from pathlib import Path
 import unicodedata
 import re
 
+try:
+    import ahocorasick
+except ImportError:  # no pyahocorasick wheel for this platform
+    ahocorasick = None
+
 router = APIRouter()
 
 # Leet speak mapping
@@ -11,22 +16,28 @@ LEET_MAP = {
     "0": "o", "1": "i", "3": "e", "4": "a",
     "5": "s", "7": "t", "@": "a", "$": "s",
 }
+_LEET_TABLE = str.maketrans(LEET_MAP)
+
+_NON_ALPHA = re.compile(r"[^a-z\s]")
+_WS = re.compile(r"\s+")
 
 
-def load_banned_words() -> set[str]:
+def load_banned_words() -> frozenset[str]:
     """Load banned words from file"""
     path = Path(__file__).resolve().parent.parent / "catalogs" / "bannedwords.txt"
 
-    banned = set()
     try:
-        with open(path, "r", encoding="utf-8") as f:
-            for line in f:
-                word = line.strip().lower()
-                if word and not word.startswith("#"):
-                    banned.add(word)
-        print(f"✅ Loaded {len(banned)} banned words")
+        # One read, split in memory
+        lines = path.read_text(encoding="utf-8").splitlines()
     except FileNotFoundError:
         print(f"⚠️ Warning: bannedwords.txt not found at {path}")
+        return frozenset()
+
+    banned = frozenset(
+        word for word in (line.strip().lower() for line in lines)
+        if word and not word.startswith("#")
+    )
+    print(f"✅ Loaded {len(banned)} banned words")
 
     return banned
 
@@ -34,16 +45,60 @@ def load_banned_words() -> set[str]:
 BANNED_WORDS = load_banned_words()
 
 
+# Matched against the space-free form of the name, so multi-word entries are
+# keyed without their spaces; values are the words as listed
+BANNED_KEYS = {word.replace(" ", ""): word for word in BANNED_WORDS}
+
+
+def build_banned_matcher(keys: dict[str, str]):
+    """
+    Compile the word list once: an Aho-Corasick automaton when pyahocorasick
+    is installed, otherwise one regex alternation (longest words first).
+    """
+    if ahocorasick is not None:
+        automaton = ahocorasick.Automaton()
+        for key, word in keys.items():
+            automaton.add_word(key, word)
+        if keys:
+            automaton.make_automaton()
+        return automaton
+
+    if not keys:
+        return re.compile(r"(?!)")
+    return re.compile("|".join(map(re.escape, sorted(keys, key=len, reverse=True))))
+
+
+BANNED_MATCHER = build_banned_matcher(BANNED_KEYS)
+
+
+def find_banned_word(text: str) -> str | None:
+    """First banned word found in text, or None"""
+    if ahocorasick is None:
+        match = BANNED_MATCHER.search(text)
+        return BANNED_KEYS[match.group(0)] if match else None
+
+    if not BANNED_KEYS:
+        return None
+    for _, word in BANNED_MATCHER.iter(text):
+        return word
+    return None
+
+
 def normalize(text: str) -> str:
     """Normalize text to detect obfuscated banned words"""
     text = text.lower()
+
+    # Plain ASCII letters and spaces (most names): nothing to decompose,
+    # translate or strip, only whitespace to collapse
+    if text.isascii() and text.replace(" ", "").isalpha():
+        return " ".join(text.split())
+
     text = unicodedata.normalize("NFKD", text)
 
-    for k, v in LEET_MAP.items():
-        text = text.replace(k, v)
+    text = text.translate(_LEET_TABLE)
 
-    text = re.sub(r"[^a-z\s]", " ", text)
-    text = re.sub(r"\s+", " ", text).strip()
+    text = _NON_ALPHA.sub(" ", text)
+    text = _WS.sub(" ", text).strip()
 
     return text
 
@@ -52,18 +107,11 @@ def contains_banned_word(username: str) -> bool:
     """Check if username contains any banned words"""
     normalized = normalize(username)
 
-    # Check each banned word
-    for banned in BANNED_WORDS:
-        if banned in normalized:
-            print(f"🚫 Blocked username '{username}' - matched: {banned}")
-            return True
-
-    # Check without spaces (catches concatenated words)
-    no_spaces = normalized.replace(" ", "")
-    for banned in BANNED_WORDS:
-        if banned in no_spaces:
-            print(f"🚫 Blocked username '{username}' - matched: {banned}")
-            return True
+    # One scan without spaces: covers words as typed and concatenated words
+    banned = find_banned_word(normalized.replace(" ", ""))
+    if banned:
+        print(f"🚫 Blocked username '{username}' - matched: {banned}")
+        return True
 
     return False
 
@@ -2,20 +2,20 @@ from fastapi import APIRouter, File, UploadFile, Form
 from fastapi.responses import JSONResponse
 from typing import Optional
 from pydantic import BaseModel
+import asyncio
 import sys
 from pathlib import Path
 
 # Go up TWO levels to reach Sourced folder
 sys.path.insert(0, str(Path(__file__).parent.parent.parent))
 
-from backend.imageSearch.backupSearch.helper_utils.search_helper_utils import upload_image_bytes_and_get_url
+from backend.imageSearch.backupSearch.helper_utils.search_helper_utils import upload_image_stream_and_get_url
 from backend.catalogs.base_functions import (
     create_catalog,
     display_catalogs,
     delete_catalog
 )
 
-owner_id = ""
 router = APIRouter()
 
 
@@ -28,10 +28,11 @@ class Catalog(BaseModel):
 
 
 @router.get("/list")
-def list_catalogs(owner_id: str, include_private: bool = True):
+async def list_catalogs(owner_id: str, include_private: bool = True):
     """Get all catalogs for a user"""
     try:
-        catalogs = display_catalogs("22ca65f1-8a37-4836-bd94-69f90ab57b60", include_private)
+        # Sync Supabase client; keep it off the event loop
+        catalogs = await asyncio.to_thread(display_catalogs, owner_id, include_private)
         return catalogs
     except Exception as e:
         import traceback
@@ -40,10 +41,10 @@ def list_catalogs(owner_id: str, include_private: bool = True):
 
 
 @router.delete("/delete/{catalog_id}")
-def delete_catalog_endpoint(catalog_id: str):
+async def delete_catalog_endpoint(catalog_id: str):
     """Delete a catalog"""
     try:
-        result = delete_catalog(catalog_id)
+        result = await asyncio.to_thread(delete_catalog, catalog_id)
         return {"success": True, "data": result}
     except Exception as e:
         import traceback
@@ -72,15 +73,20 @@ async def create_catalog_endpoint(
             if not image:
                 return JSONResponse(status_code=400, content={"error": "No image file provided"})
 
-            image_bytes = await image.read()
-            final_image_url = upload_image_bytes_and_get_url(image_bytes)
+            # Stream the spooled upload to storage instead of reading it into memory
+            final_image_url = await asyncio.to_thread(
+                upload_image_stream_and_get_url,
+                image.file,
+                image.filename or "image.jpg",
+                image.size
+            )
 
             if not final_image_url:
                 return JSONResponse(status_code=500, content={"error": "Failed to upload image"})
         else:
             return JSONResponse(status_code=400, content={"error": "Invalid image type"})
 
-        catalog_data = create_catalog(
+        catalog_data = await create_catalog(
             owner_id=owner_id,
             title=title,
             image=final_image_url,
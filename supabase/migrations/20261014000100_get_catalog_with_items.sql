@@ -0,0 +1,21 @@
+-- Catalog row and its items in one round-trip, items oldest first.
+-- Returns null when the catalog doesn't exist.
+create or replace function public.get_catalog_with_items(cid uuid)
+returns jsonb
+language sql
+stable
+as $$
+  select jsonb_build_object(
+    'catalog', to_jsonb(c),
+    'items', coalesce(
+      (
+        select jsonb_agg(to_jsonb(i) order by i.created_at)
+        from public.catalog_items i
+        where i.catalog_id = c.id
+      ),
+      '[]'::jsonb
+    )
+  )
+  from public.catalogs c
+  where c.id = cid;
+$$;
@@ -0,0 +1,67 @@
+-- Everything the feed needs to know about a user's taste, in one call:
+-- followed users, creators they engage with (most engaged first), average
+-- view time over their last 100 views, and their latest engaged posts.
+-- A view counts as engaged when they interacted or stayed over 3 seconds.
+create or replace function public.get_user_preference_signals(p_user_id uuid)
+returns jsonb
+language sql
+stable
+as $$
+  with recent_views as (
+    select post_id, time_spent_ms, interacted, viewed_at
+    from public.post_views
+    where user_id = p_user_id
+    order by viewed_at desc
+    limit 100
+  ),
+  engaged as (
+    select post_id, viewed_at
+    from recent_views
+    where interacted or time_spent_ms > 3000
+  ),
+  engaged_creators as (
+    select fp.owner_id, count(*) as engagement, max(e.viewed_at) as last_viewed
+    from (select * from engaged order by viewed_at desc limit 50) e
+    join public.feed_posts fp on fp.id = e.post_id
+    group by fp.owner_id
+  )
+  select jsonb_build_object(
+    'followed_users', coalesce(
+      (
+        select jsonb_agg(f.following_id)
+        from (
+          select following_id
+          from public.followers
+          where follower_id = p_user_id
+          limit 200
+        ) f
+      ),
+      '[]'::jsonb
+    ),
+    'engaged_creators', coalesce(
+      (
+        select jsonb_agg(owner_id order by engagement desc, last_viewed desc)
+        from engaged_creators
+      ),
+      '[]'::jsonb
+    ),
+    'avg_view_time', coalesce(
+      (select avg(coalesce(time_spent_ms, 0)) from recent_views),
+      0
+    ),
+    'recent_interactions', coalesce(
+      (
+        select jsonb_agg(e.post_id order by e.viewed_at desc)
+        from (select * from engaged order by viewed_at desc limit 20) e
+      ),
+      '[]'::jsonb
+    )
+  );
+$$;
+
+-- Equality column first, range/sort column last
+create index if not exists post_views_user_viewed_at_idx
+  on public.post_views (user_id, viewed_at desc);
+
+create index if not exists followers_follower_id_idx
+  on public.followers (follower_id);
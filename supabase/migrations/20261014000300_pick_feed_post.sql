@@ -0,0 +1,56 @@
+-- Pick the next feed post server-side.
+--
+-- Candidates are the newest posts matching the strategy (20, or 50 for
+-- discovery), minus the ones already seen. They are ranked by
+--   (likes + 3 * comments) / (1 + age in days)
+-- and one of the top 5 is returned at random so the feed doesn't repeat
+-- itself. Returns {"post": {...}, "total_fetched": n}, or null when nothing
+-- matches.
+create or replace function public.pick_feed_post(
+  p_strategy text,
+  p_exclude_ids uuid[] default '{}',
+  p_followed_ids uuid[] default '{}',
+  p_engaged_creators uuid[] default '{}'
+)
+returns jsonb
+language sql
+volatile
+as $$
+  with candidates as (
+    select fp.id, fp.image_url, fp.caption, fp.like_count, fp.comment_count,
+           fp.music_preview_url, fp.owner_id, fp.created_at
+    from public.feed_posts fp
+    where fp.id <> all(coalesce(p_exclude_ids, '{}'))
+      and case p_strategy
+            when 'followed' then fp.owner_id = any(p_followed_ids)
+            when 'engaged_creators' then fp.owner_id = any(p_engaged_creators)
+            when 'popular' then fp.like_count >= 1
+            else true
+          end
+    order by fp.created_at desc
+    limit case when p_strategy = 'discovery' then 50 else 20 end
+  ),
+  top_candidates as (
+    select *
+    from candidates c
+    order by (coalesce(c.like_count, 0) + 3 * coalesce(c.comment_count, 0))
+             / (1 + extract(epoch from now() - c.created_at) / 86400) desc
+    limit 5
+  ),
+  picked as (
+    select * from top_candidates order by random() limit 1
+  )
+  select jsonb_build_object(
+    'post', to_jsonb(p) || jsonb_build_object(
+      'profiles', jsonb_build_object(
+        'id', pr.id,
+        'username', pr.username,
+        'avatar_url', pr.avatar_url,
+        'is_verified', pr.is_verified
+      )
+    ),
+    'total_fetched', (select count(*) from candidates)
+  )
+  from picked p
+  left join public.profiles pr on pr.id = p.owner_id;
+$$;
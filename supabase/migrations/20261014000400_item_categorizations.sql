@@ -0,0 +1,11 @@
+-- Cache of AI categorization results, keyed by
+-- sha256(title || '|' || image_url || '|' || product_url).
+-- The primary key doubles as the lookup index.
+create table if not exists public.item_categorizations (
+  key text primary key,
+  metadata jsonb not null,
+  created_at timestamptz not null default now()
+);
+
+-- Only the backend (service role) reads and writes this table
+alter table public.item_categorizations enable row level security;
@@ -0,0 +1,46 @@
+-- Insert an item only if p_user_id owns the target catalog, in one statement.
+-- Raises 42501 (insufficient_privilege) when the ownership check fails so the
+-- caller can map it to a 403. Column types come from catalog_items itself.
+create or replace function public.insert_catalog_item(p_user_id uuid, p_item jsonb)
+returns setof public.catalog_items
+language plpgsql
+as $$
+begin
+  return query
+  insert into public.catalog_items (
+    catalog_id, title, image_url, product_url, seller, price,
+    category, subcategory, brand, product_type, colors, primary_color,
+    material, pattern, style_tags, season, formality, gender, fit_type,
+    occasion_tags, price_tier, categorization_confidence
+  )
+  select
+    r.catalog_id, r.title, r.image_url, r.product_url, r.seller, r.price,
+    r.category, r.subcategory, r.brand, r.product_type, r.colors, r.primary_color,
+    r.material, r.pattern, r.style_tags, r.season, r.formality, r.gender, r.fit_type,
+    r.occasion_tags, r.price_tier, r.categorization_confidence
+  from jsonb_populate_record(null::public.catalog_items, p_item) r
+  where exists (
+    select 1 from public.catalogs c
+    where c.id = r.catalog_id and c.owner_id = p_user_id
+  )
+  returning *;
+
+  if not found then
+    raise exception 'You don''t own this catalog' using errcode = '42501';
+  end if;
+end;
+$$;
+
+-- Same rule for clients that insert directly with their own JWT, wherever RLS
+-- is enabled on catalog_items. The backend uses the service role (which
+-- bypasses RLS), hence the function above.
+
+drop policy if exists owner_insert on public.catalog_items;
+create policy owner_insert on public.catalog_items
+  for insert
+  with check (
+    exists (
+      select 1 from public.catalogs c
+      where c.id = catalog_id and c.owner_id = auth.uid()
+    )
+  );
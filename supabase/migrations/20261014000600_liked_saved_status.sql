@@ -0,0 +1,17 @@
+-- Whether a user has liked and/or saved a post, in one call.
+-- Both EXISTS checks are (user_id, feed_post_id) lookups.
+create or replace function public.liked_saved_status(p_user uuid, p_post uuid)
+returns table (is_liked boolean, is_saved boolean)
+language sql
+stable
+as $$
+  select
+    exists (
+      select 1 from public.liked_feed_posts
+      where user_id = p_user and feed_post_id = p_post
+    ) as is_liked,
+    exists (
+      select 1 from public.saved_feed_posts
+      where user_id = p_user and feed_post_id = p_post
+    ) as is_saved;
+$$;
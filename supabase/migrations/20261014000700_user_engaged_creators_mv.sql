@@ -0,0 +1,82 @@
+-- Per-user engagement with each creator, precomputed so preference signals
+-- don't re-join post_views to feed_posts on every read. Refreshed every 5
+-- minutes by pg_cron, so new views show up in engaged_creators within that
+-- window. A view counts as engaged when the user interacted or stayed over
+-- 3 seconds, as before.
+create materialized view if not exists public.user_engaged_creators_mv as
+  select pv.user_id,
+         fp.owner_id as creator_id,
+         count(*) as score,
+         max(pv.viewed_at) as last_viewed
+  from public.post_views pv
+  join public.feed_posts fp on fp.id = pv.post_id
+  where pv.interacted or pv.time_spent_ms > 3000
+  group by pv.user_id, fp.owner_id;
+
+-- Required for REFRESH ... CONCURRENTLY
+create unique index if not exists user_engaged_creators_mv_user_creator_idx
+  on public.user_engaged_creators_mv (user_id, creator_id);
+
+create index if not exists user_engaged_creators_mv_user_score_idx
+  on public.user_engaged_creators_mv (user_id, score desc);
+
+create extension if not exists pg_cron;
+
+select cron.schedule(
+  'refresh-user-engaged-creators',
+  '*/5 * * * *',
+  $$refresh materialized view concurrently public.user_engaged_creators_mv$$
+);
+
+-- Same output as before; engaged_creators now reads the materialized view
+create or replace function public.get_user_preference_signals(p_user_id uuid)
+returns jsonb
+language sql
+stable
+as $$
+  with recent_views as (
+    select post_id, time_spent_ms, interacted, viewed_at
+    from public.post_views
+    where user_id = p_user_id
+    order by viewed_at desc
+    limit 100
+  ),
+  engaged as (
+    select post_id, viewed_at
+    from recent_views
+    where interacted or time_spent_ms > 3000
+  )
+  select jsonb_build_object(
+    'followed_users', coalesce(
+      (
+        select jsonb_agg(f.following_id)
+        from (
+          select following_id
+          from public.followers
+          where follower_id = p_user_id
+          limit 200
+        ) f
+      ),
+      '[]'::jsonb
+    ),
+    'engaged_creators', coalesce(
+      (
+        select jsonb_agg(creator_id order by score desc, last_viewed desc)
+        from public.user_engaged_creators_mv
+        where user_id = p_user_id
+      ),
+      '[]'::jsonb
+    ),
+    'avg_view_time', coalesce(
+      (select avg(coalesce(time_spent_ms, 0)) from recent_views),
+      0
+    ),
+    'recent_interactions', coalesce(
+      (
+        select jsonb_agg(e.post_id order by e.viewed_at desc)
+        from (select * from engaged order by viewed_at desc limit 20) e
+      ),
+      '[]'::jsonb
+    )
+  );
+$$;
@@ -0,0 +1,59 @@
+-- Only the top 30 engaged creators are used by pick_feed_post, so take the
+-- top-N in the index scan instead of aggregating every creator the user has
+-- engaged with.
+create or replace function public.get_user_preference_signals(p_user_id uuid)
+returns jsonb
+language sql
+stable
+as $$
+  with recent_views as (
+    select post_id, time_spent_ms, interacted, viewed_at
+    from public.post_views
+    where user_id = p_user_id
+    order by viewed_at desc
+    limit 100
+  ),
+  engaged as (
+    select post_id, viewed_at
+    from recent_views
+    where interacted or time_spent_ms > 3000
+  )
+  select jsonb_build_object(
+    'followed_users', coalesce(
+      (
+        select jsonb_agg(f.following_id)
+        from (
+          select following_id
+          from public.followers
+          where follower_id = p_user_id
+          limit 200
+        ) f
+      ),
+      '[]'::jsonb
+    ),
+    'engaged_creators', coalesce(
+      (
+        select jsonb_agg(t.creator_id order by t.score desc, t.last_viewed desc)
+        from (
+          select creator_id, score, last_viewed
+          from public.user_engaged_creators_mv
+          where user_id = p_user_id
+          order by score desc, last_viewed desc
+          limit 30
+        ) t
+      ),
+      '[]'::jsonb
+    ),
+    'avg_view_time', coalesce(
+      (select avg(coalesce(time_spent_ms, 0)) from recent_views),
+      0
+    ),
+    'recent_interactions', coalesce(
+      (
+        select jsonb_agg(e.post_id order by e.viewed_at desc)
+        from (select * from engaged order by viewed_at desc limit 20) e
+      ),
+      '[]'::jsonb
+    )
+  );
+$$;
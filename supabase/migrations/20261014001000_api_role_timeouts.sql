@@ -0,0 +1,12 @@
+-- Keep a slow or stuck API request from holding a Postgres backend.
+-- PostgREST applies the impersonated role's statement_timeout per request;
+-- idle_in_transaction_session_timeout is a session setting, so it goes on the
+-- authenticator login role that PostgREST's pool connects as. service_role
+-- is left alone: the backend's admin paths (bulk inserts, batch deletes,
+-- catalog and feed RPCs) legitimately run longer than a client request.
+alter role anon set statement_timeout = '5s';
+alter role authenticated set statement_timeout = '5s';
+
+alter role authenticator set idle_in_transaction_session_timeout = '30s';
+
+notify pgrst, 'reload config';
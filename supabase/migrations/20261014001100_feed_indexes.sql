@@ -0,0 +1,15 @@
+-- Indexes for pick_feed_post and the feed item lookups.
+-- Equality column first, range/sort column last.
+
+-- followed / engaged_creators strategies: owner_id = any(...) order by created_at desc
+create index if not exists feed_posts_owner_created_idx
+  on public.feed_posts (owner_id, created_at desc);
+
+-- popular strategy: like_count >= 1 order by created_at desc
+create index if not exists feed_posts_hot_idx
+  on public.feed_posts (created_at desc)
+  where like_count >= 1;
+
+-- Embedded per-user likes on feed_post_items
+create index if not exists liked_feed_post_items_user_item_idx
+  on public.liked_feed_post_items (user_id, item_id);
@@ -0,0 +1,40 @@
+-- Items added through the bulk endpoint are inserted before they're
+-- categorized; the Batch API results fill in their metadata later.
+alter table public.catalog_items
+  add column if not exists pending_categorization boolean not null default false;
+
+create index if not exists catalog_items_pending_categorization_idx
+  on public.catalog_items (id)
+  where pending_categorization;
+
+-- insert_catalog_item now passes pending_categorization through
+create or replace function public.insert_catalog_item(p_user_id uuid, p_item jsonb)
+returns setof public.catalog_items
+language plpgsql
+as $$
+begin
+  return query
+  insert into public.catalog_items (
+    catalog_id, title, image_url, product_url, seller, price,
+    category, subcategory, brand, product_type, colors, primary_color,
+    material, pattern, style_tags, season, formality, gender, fit_type,
+    occasion_tags, price_tier, categorization_confidence, pending_categorization
+  )
+  select
+    r.catalog_id, r.title, r.image_url, r.product_url, r.seller, r.price,
+    r.category, r.subcategory, r.brand, r.product_type, r.colors, r.primary_color,
+    r.material, r.pattern, r.style_tags, r.season, r.formality, r.gender, r.fit_type,
+    r.occasion_tags, r.price_tier, r.categorization_confidence,
+    coalesce(r.pending_categorization, false)
+  from jsonb_populate_record(null::public.catalog_items, p_item) r
+  where exists (
+    select 1 from public.catalogs c
+    where c.id = r.catalog_id and c.owner_id = p_user_id
+  )
+  returning *;
+
+  if not found then
+    raise exception 'You don''t own this catalog' using errcode = '42501';
+  end if;
+end;
+$$;
@@ -0,0 +1,29 @@
+-- Multi-row version of insert_catalog_item for the bulk endpoint.
+-- p_items is a json array of {"user_id": ..., "item": {...catalog_items row}}.
+-- Each row is inserted only if its user owns the target catalog; rows that
+-- fail the check are skipped rather than aborting the batch. Callers supply
+-- the ids so they can tell which rows went in.
+create or replace function public.insert_catalog_items(p_items jsonb)
+returns setof public.catalog_items
+language sql
+as $$
+  insert into public.catalog_items (
+    id, catalog_id, title, image_url, product_url, seller, price,
+    category, subcategory, brand, product_type, colors, primary_color,
+    material, pattern, style_tags, season, formality, gender, fit_type,
+    occasion_tags, price_tier, categorization_confidence, pending_categorization
+  )
+  select
+    r.id, r.catalog_id, r.title, r.image_url, r.product_url, r.seller, r.price,
+    r.category, r.subcategory, r.brand, r.product_type, r.colors, r.primary_color,
+    r.material, r.pattern, r.style_tags, r.season, r.formality, r.gender, r.fit_type,
+    r.occasion_tags, r.price_tier, r.categorization_confidence,
+    coalesce(r.pending_categorization, false)
+  from jsonb_array_elements(p_items) e
+  cross join lateral jsonb_populate_record(null::public.catalog_items, e->'item') r
+  where exists (
+    select 1 from public.catalogs c
+    where c.id = r.catalog_id and c.owner_id = (e->>'user_id')::uuid
+  )
+  returning *;
+$$;
@@ -0,0 +1,12 @@
+-- Categorizations are reused for 30 days; the backend ignores older rows and
+-- this job deletes them daily so the table doesn't grow without bound.
+create index if not exists item_categorizations_created_at_idx
+  on public.item_categorizations (created_at);
+
+create extension if not exists pg_cron;
+
+select cron.schedule(
+  'purge-item-categorizations',
+  '15 3 * * *',
+  $$delete from public.item_categorizations where created_at < now() - interval '30 days'$$
+);
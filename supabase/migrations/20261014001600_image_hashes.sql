@@ -0,0 +1,25 @@
+-- Moderation verdicts keyed by 64-bit perceptual hash (stored as a signed
+-- bigint), so near-duplicate images skip the moderation API.
+create table if not exists public.image_hashes (
+  phash bigint primary key,
+  safe boolean not null,
+  created_at timestamptz not null default now()
+);
+
+-- Only the backend (service role) reads and writes this table
+alter table public.image_hashes enable row level security;
+
+-- Closest judged image within p_max_distance bits (Hamming distance).
+-- Unsafe wins ties. A linear scan over 8-byte keys; fine at this table's
+-- size, swap for a BK-tree/pg_similarity if it grows into the millions.
+create or replace function public.match_image_hash(p_hash bigint, p_max_distance int default 5)
+returns table (safe boolean, distance int)
+language sql
+stable
+as $$
+  select h.safe, bit_count((h.phash # p_hash)::bit(64))::int as distance
+  from public.image_hashes h
+  where bit_count((h.phash # p_hash)::bit(64)) <= p_max_distance
+  order by distance, h.safe
+  limit 1;
+$$;
@@ -0,0 +1,86 @@
+-- One candidate query per strategy. The CASE filter in 000900 hid every
+-- predicate inside an expression the planner can't match against an index,
+-- so each strategy gets its own arm with a plain WHERE. The p_strategy guard
+-- turns into a one-time filter, so only the matching arm is executed, and
+-- the arms line up with feed_posts_owner_created_idx (followed,
+-- engaged_creators) and feed_posts_hot_idx (popular).
+create or replace function public.pick_feed_post(
+  p_strategy text,
+  p_exclude_ids uuid[] default '{}',
+  p_followed_ids uuid[] default '{}',
+  p_engaged_creators uuid[] default '{}'
+)
+returns jsonb
+language sql
+volatile
+as $$
+  with candidates as (
+    (
+      select fp.id, fp.like_count, fp.comment_count, fp.owner_id, fp.created_at
+      from public.feed_posts fp
+      where p_strategy = 'followed'
+        and fp.owner_id = any(p_followed_ids)
+        and fp.id <> all(coalesce(p_exclude_ids, '{}'))
+      order by fp.created_at desc
+      limit 20
+    )
+    union all
+    (
+      select fp.id, fp.like_count, fp.comment_count, fp.owner_id, fp.created_at
+      from public.feed_posts fp
+      where p_strategy = 'engaged_creators'
+        and fp.owner_id = any(p_engaged_creators)
+        and fp.id <> all(coalesce(p_exclude_ids, '{}'))
+      order by fp.created_at desc
+      limit 20
+    )
+    union all
+    (
+      select fp.id, fp.like_count, fp.comment_count, fp.owner_id, fp.created_at
+      from public.feed_posts fp
+      where p_strategy = 'popular'
+        and fp.like_count >= 1
+        and fp.id <> all(coalesce(p_exclude_ids, '{}'))
+      order by fp.created_at desc
+      limit 20
+    )
+    union all
+    (
+      select fp.id, fp.like_count, fp.comment_count, fp.owner_id, fp.created_at
+      from public.feed_posts fp
+      where p_strategy not in ('followed', 'engaged_creators', 'popular')
+        and fp.id <> all(coalesce(p_exclude_ids, '{}'))
+      order by fp.created_at desc
+      limit case when p_strategy = 'discovery' then 50 else 20 end
+    )
+  ),
+  top_candidates as (
+    select *
+    from candidates c
+    order by (coalesce(c.like_count, 0) + 3 * coalesce(c.comment_count, 0))
+             / (1 + extract(epoch from now() - c.created_at) / 86400) desc
+    limit 5
+  ),
+  picked as (
+    select id from top_candidates order by random() limit 1
+  ),
+  winner as (
+    select fp.id, fp.image_url, fp.caption, fp.like_count, fp.comment_count,
+           fp.music_preview_url, fp.owner_id, fp.created_at
+    from picked
+    join public.feed_posts fp on fp.id = picked.id
+  )
+  select jsonb_build_object(
+    'post', to_jsonb(w) || jsonb_build_object(
+      'profiles', jsonb_build_object(
+        'id', pr.id,
+        'username', pr.username,
+        'avatar_url', pr.avatar_url,
+        'is_verified', pr.is_verified
+      )
+    ),
+    'total_fetched', (select count(*) from candidates)
+  )
+  from winner w
+  left join public.profiles pr on pr.id = w.owner_id;
+$$;
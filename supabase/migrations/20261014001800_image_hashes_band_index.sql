@@ -0,0 +1,40 @@
+-- Indexed near-duplicate lookup. The 64-bit hash is split into six bands of
+-- 10-11 bits; two hashes within 5 bits of each other differ in at most five
+-- bands, so they agree exactly on at least one (pigeonhole). The lookup reads
+-- only rows that share a band, through the band indexes, and checks the full
+-- Hamming distance on those.
+alter table public.image_hashes
+  add column if not exists band0 int generated always as ((phash & 2047)::int) stored,
+  add column if not exists band1 int generated always as (((phash >> 11) & 2047)::int) stored,
+  add column if not exists band2 int generated always as (((phash >> 22) & 2047)::int) stored,
+  add column if not exists band3 int generated always as (((phash >> 33) & 2047)::int) stored,
+  add column if not exists band4 int generated always as (((phash >> 44) & 1023)::int) stored,
+  add column if not exists band5 int generated always as (((phash >> 54) & 1023)::int) stored;
+
+create index if not exists image_hashes_band0_idx on public.image_hashes (band0);
+create index if not exists image_hashes_band1_idx on public.image_hashes (band1);
+create index if not exists image_hashes_band2_idx on public.image_hashes (band2);
+create index if not exists image_hashes_band3_idx on public.image_hashes (band3);
+create index if not exists image_hashes_band4_idx on public.image_hashes (band4);
+create index if not exists image_hashes_band5_idx on public.image_hashes (band5);
+
+-- Closest judged image within p_max_distance bits (Hamming distance).
+-- Unsafe wins ties. Six bands only guarantee a shared band up to 5 bits, so
+-- larger distances are capped there.
+create or replace function public.match_image_hash(p_hash bigint, p_max_distance int default 5)
+returns table (safe boolean, distance int)
+language sql
+stable
+as $$
+  select h.safe, bit_count((h.phash # p_hash)::bit(64))::int as distance
+  from public.image_hashes h
+  where (h.band0 = (p_hash & 2047)::int
+      or h.band1 = ((p_hash >> 11) & 2047)::int
+      or h.band2 = ((p_hash >> 22) & 2047)::int
+      or h.band3 = ((p_hash >> 33) & 2047)::int
+      or h.band4 = ((p_hash >> 44) & 1023)::int
+      or h.band5 = ((p_hash >> 54) & 1023)::int)
+    and bit_count((h.phash # p_hash)::bit(64)) <= least(p_max_distance, 5)
+  order by distance, h.safe
+  limit 1;
+$$;
@@ -0,0 +1,6 @@
+-- Undo the 5s statement_timeout that earlier versions of 20261014001000 put
+-- on service_role, for databases that already ran it. Backend admin work
+-- falls back to the database default again.
+alter role service_role reset statement_timeout;
+
+notify pgrst, 'reload config';